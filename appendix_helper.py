@@ -0,0 +1,67 @@
+# appendix_helper.py
+from reportlab.platypus import PageBreak, Paragraph
+
+from config import GENERAL_ARABIC_FONT
+from corpus_stats import compute_corpus_statistics, export_statistics
+from flowables_helper import AppendixTable
+from styles_helpers import generate_appendix_styles
+from utils import ar, get_cols_from_ratios, localize_digits
+
+# (English, Arabic) titles of the statistics tables and labels of their columns
+APPENDIX_TITLES = {
+    "roots": ("Roots frequency", "تكرار الجذور"),
+    "suras": ("Entries per sura", "المواضع في كل سورة"),
+    "pages": ("Entries per Mushaf page", "المواضع في كل صفحة من المصحف"),
+    "words": ("Words frequency", "تكرار الألفاظ"),
+}
+APPENDIX_LABELS = {
+    "root": ("Root", "الجذر"),
+    "sura": ("Sura", "السورة"),
+    "page": ("Page", "الصفحة"),
+    "simple": ("Word", "اللفظة"),
+    "entries": ("Entries", "المواضع"),
+    "ayas": ("Ayas", "الآيات"),
+    "suras": ("Suras", "السور"),
+    "roots": ("Roots", "الجذور"),
+    "words": ("Words", "الألفاظ"),
+    "tokens": ("Tokens", "الكلمات"),
+    "corpus_occurrences": ("Corpus occurrences", "مرات الورود"),
+    "entries_per_1000_tokens": ("Entries per 1000 tokens", "لكل ١٠٠٠ كلمة"),
+}
+ARABIC_COLUMNS = {"root", "simple"}
+
+
+def get_label(labels, is_arabic):
+    return ar(labels[1]) if is_arabic else labels[0]
+
+
+def format_statistic(value, is_arabic):
+    return localize_digits(f"{value:.2f}" if isinstance(value, float) else str(value), is_arabic)
+
+
+def generate_appendix_table(table, table_width, table_style, is_arabic):
+    """Plain string cells, the Arabic text columns drawn with the Arabic font (the table style sets the others)."""
+    rows = [[get_label(APPENDIX_LABELS[column], is_arabic) for column in table.columns]]
+    for values in table.itertuples(index=False):
+        rows.append([ar(value) if column in ARABIC_COLUMNS else format_statistic(value, is_arabic) for column, value in zip(table.columns, values)])
+    # text columns get twice the width of the numbers
+    col_widths = get_cols_from_ratios([2 if column in ARABIC_COLUMNS else 1 for column in table.columns], table_width)
+    appendix_table = AppendixTable(rows, colWidths=col_widths, repeatRows=1)
+    appendix_table.setStyle(table_style)
+    for col_idx, column in enumerate(table.columns):
+        if column in ARABIC_COLUMNS:
+            appendix_table.setStyle([('FONTNAME', (col_idx, 1), (col_idx, -1), GENERAL_ARABIC_FONT)])
+    return appendix_table
+
+
+def generate_appendix(source_data, q_mapper, table_width, options, export=True):
+    """Statistics appendix appended after the root tables, the statistics are exported as CSV as well with export."""
+    statistics = compute_corpus_statistics(source_data, q_mapper)
+    if export:
+        export_statistics(statistics)
+    title_style, table_style = generate_appendix_styles(options)
+    flowables = [PageBreak()]
+    for name, table in statistics.items():
+        flowables += [Paragraph(get_label(APPENDIX_TITLES[name], options.is_arabic), title_style),
+                      generate_appendix_table(table, table_width, table_style, options.is_arabic)]
+    return flowables
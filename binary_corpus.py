@@ -0,0 +1,155 @@
+# binary_corpus.py
+"""
+Compact binary corpus of the aya/token/glyph mapping produced by create_font_text_mapping.
+
+Layout (little endian), offsets of the string pool are relative to its start:
+    header    magic, version, suras count, ayas count, tokens count, offsets of the four sections below
+    suras     index of the first aya of each sura, plus a sentinel (suras count + 1 entries)
+    ayas      sura, aya, font page, first token, tokens count, symbols offset/length in the pool
+    tokens    uthmani offset/length, simple offset/length in the pool
+    pool      packed UTF-8 strings
+
+The file is memory-mapped read-only and queried by (sura, aya, token) with struct.unpack_from, so nothing is
+materialized beyond the requested strings, and worker processes share the same pages of the OS cache.
+"""
+import mmap
+import struct
+import sys
+
+from config import BINARY_CORPUS
+
+MAGIC = b"QRBC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIIII")
+SURA = struct.Struct("<I")
+AYA = struct.Struct("<HHHIHII")
+TOKEN = struct.Struct("<IHIH")
+
+
+def build_binary_corpus(q_mapper, path=BINARY_CORPUS):
+    """Writes the {(sura, aya): meta} mapping of create_font_text_mapping as a binary corpus file."""
+    keys = sorted(key for key, meta in q_mapper.items() if "uthmani" in meta)
+    n_suras = keys[-1][0] + 1
+    pool = bytearray()
+
+    def add_string(text):
+        offset = len(pool)
+        pool.extend(text.encode("utf-8"))
+        return offset, len(pool) - offset
+
+    sura_starts = [0] * (n_suras + 1)
+    aya_rows = []
+    token_rows = []
+    for aya_idx, (sura, aya) in enumerate(keys):
+        meta = q_mapper[sura, aya]
+        if aya == 0:
+            sura_starts[sura] = aya_idx
+        symbols_offset, symbols_length = add_string("".join(meta["symbols"]))
+        aya_rows.append(AYA.pack(sura, aya, int(meta["font_id"][1:]), len(token_rows), len(meta["uthmani"]),
+                                 symbols_offset, symbols_length))
+        for uthmani, simple in zip(meta["uthmani"], meta["simple"]):
+            token_rows.append(TOKEN.pack(*add_string(uthmani), *add_string(simple)))
+    sura_starts[n_suras] = len(keys)
+
+    sura_offset = HEADER.size
+    aya_offset = sura_offset + SURA.size * len(sura_starts)
+    token_offset = aya_offset + AYA.size * len(aya_rows)
+    pool_offset = token_offset + TOKEN.size * len(token_rows)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n_suras, len(keys), len(token_rows),
+                            sura_offset, aya_offset, token_offset, pool_offset))
+        f.write(b"".join(SURA.pack(start) for start in sura_starts))
+        f.write(b"".join(aya_rows))
+        f.write(b"".join(token_rows))
+        f.write(pool)
+    return path
+
+
+class BinaryCorpus:
+    """Read-only memory-mapped view of a binary corpus file, keys are 0-based (sura, aya) like q_mapper."""
+
+    def __init__(self, path=BINARY_CORPUS):
+        self.path = path
+        self._open()
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.n_suras, self.n_ayas, self.n_tokens,
+         self._sura_offset, self._aya_offset, self._token_offset, self._pool_offset) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} binary corpus")
+
+    # pickled as the path only, each worker process maps the same file
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self._open()
+
+    def close(self):
+        self._mm.close()
+
+    def _string(self, offset, length):
+        start = self._pool_offset + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def _aya_row(self, sura, aya):
+        if not 0 <= sura < self.n_suras:
+            raise KeyError((sura, aya))
+        first_aya, next_sura_first_aya = struct.unpack_from("<II", self._mm, self._sura_offset + SURA.size * sura)
+        if not 0 <= aya < next_sura_first_aya - first_aya:
+            raise KeyError((sura, aya))
+        return AYA.unpack_from(self._mm, self._aya_offset + AYA.size * (first_aya + aya))
+
+    def font_id(self, sura, aya):
+        return f"p{self._aya_row(sura, aya)[2]}"
+
+    def symbols(self, sura, aya):
+        """All the font symbols of the aya, including the aya end symbol."""
+        *_, symbols_offset, symbols_length = self._aya_row(sura, aya)
+        return self._string(symbols_offset, symbols_length)
+
+    def token_count(self, sura, aya):
+        return self._aya_row(sura, aya)[4]
+
+    def token(self, sura, aya, token_idx):
+        """Returns (symbol, uthmani, simple) of a single token."""
+        _, _, _, first_token, n_tokens, symbols_offset, symbols_length = self._aya_row(sura, aya)
+        if not 0 <= token_idx < n_tokens:
+            raise IndexError(token_idx)
+        uthmani_offset, uthmani_length, simple_offset, simple_length = TOKEN.unpack_from(
+            self._mm, self._token_offset + TOKEN.size * (first_token + token_idx))
+        symbol = self._string(symbols_offset, symbols_length)[token_idx]
+        return symbol, self._string(uthmani_offset, uthmani_length), self._string(simple_offset, simple_length)
+
+    def __contains__(self, key):
+        try:
+            self._aya_row(*key)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, key):
+        """Materializes a single aya in the create_font_text_mapping format, so it can stand in for q_mapper."""
+        sura, aya = key
+        _, _, page, first_token, n_tokens, symbols_offset, symbols_length = self._aya_row(sura, aya)
+        uthmani, simple = [], []
+        for token_idx in range(first_token, first_token + n_tokens):
+            uthmani_offset, uthmani_length, simple_offset, simple_length = TOKEN.unpack_from(
+                self._mm, self._token_offset + TOKEN.size * token_idx)
+            uthmani.append(self._string(uthmani_offset, uthmani_length))
+            simple.append(self._string(simple_offset, simple_length))
+        return {"symbols": list(self._string(symbols_offset, symbols_length)),
+                "uthmani": uthmani,
+                "font_id": f"p{page}",
+                "simple": simple}
+
+
+if __name__ == "__main__":
+    from quran_data import create_font_text_mapping
+
+    corpus_path = sys.argv[1] if len(sys.argv) > 1 else BINARY_CORPUS
+    build_binary_corpus(create_font_text_mapping(), corpus_path)
+    print(f"{corpus_path} has been saved")
@@ -2,7 +2,7 @@ from collections import defaultdict
 
 from reportlab.platypus import Table
 
-from config import IS_ARABIC, ROOT_BG_COLOR, SINGLE_COLUMN
+from styles_helpers import ROOT_BG_COLOR
 
 
 # Simulate the nested dictionary structure
@@ -19,8 +19,9 @@ def build_nested_structure(entries):
     return nested_dict
 
 
-def add_page_bookmarks(canvas, doc, bookmarks_lookup):
-    for key_idx, keys in enumerate(bookmarks_lookup[doc.page]):
+def add_page_bookmarks(canvas, doc, bookmarks_lookup, is_arabic):
+    # pages without bookmarks (the appendix) are not added to the lookup
+    for key_idx, keys in enumerate(bookmarks_lookup.get(doc.page, [])):
         if keys is None:
             keys = ["Root"]
             level = 0
@@ -29,10 +30,10 @@ def add_page_bookmarks(canvas, doc, bookmarks_lookup):
 
         canvas.bookmarkPage(f"page_{doc.page}_{key_idx}_{" ".join(keys)}")
         last_char = keys[-1]
-        if IS_ARABIC:
+        if is_arabic:
             canvas.addOutlineEntry(last_char, f"page_{doc.page}_{key_idx}_{" ".join(keys)}", level=level)
 
-    if not IS_ARABIC and doc.page == max(bookmarks_lookup.keys()):
+    if not is_arabic and doc.page == max(bookmarks_lookup.keys()):
         reorder_bookmarks = []
         for current_page in bookmarks_lookup:
             for key_idx, keys in enumerate(bookmarks_lookup[current_page]):
@@ -49,12 +50,17 @@ def add_page_bookmarks(canvas, doc, bookmarks_lookup):
             canvas.addOutlineEntry(keys[-1], f"page_{current_page}_{key_idx}_{" ".join(keys)}", level=level)
 
 
+def is_root_subtable(element):
+    return (isinstance(element, Table) and element._ncols == 1 and element._bkgrndcmds
+            and element._bkgrndcmds[-1][-1] == ROOT_BG_COLOR)  # TODO
+
+
 def extract_root_tables_from_super_table(table, ):
     found_root_subtables = []
     for row in table._cellvalues:
         for cell in row:
             for element in cell:
-                if isinstance(element, Table) and element._ncols == 1 and element._bkgrndcmds[-1][-1] == ROOT_BG_COLOR: # TODO
+                if is_root_subtable(element):
                     found_root_subtables.append(element)
     roots_in_page = []
     for table in found_root_subtables:
@@ -0,0 +1,183 @@
+# build_manifest.py
+"""
+Build manifest: the content hashes of every input of a build (spreadsheet, resource files, translations, fonts, the
+project modules it imports) and the effective configuration, saved next to the output as *_manifest.json with the
+hashes of the written files. When the last build with the same layout options has the same inputs and its files are
+unchanged, they are reused instead of rendering the book again, otherwise the inputs that differ are logged. Files
+are hashed again only when their size or modification time changed:
+
+    python build_manifest.py
+
+prints the inputs changed since the last build, the exit status is 1 when there is any.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+import config
+
+# options not changing the rendered book
+NON_OUTPUT_OPTIONS = {"BUILD_MANIFEST", "COMPRESSION_WORKERS", "PROFILE_LAYOUT", "WATCH_INTERVAL", "VALIDATION_REPORT",
+                      "GLYPH_COVERAGE_REPORT", "CANONICALIZATION_CACHE", "GLYPH_COVERAGE_CACHE", "LOOKUP_SERVICE_HOST",
+                      "LOOKUP_SERVICE_PORT", "CHECK_GLYPH_COVERAGE"}
+
+
+def get_manifest_path(output_path):
+    return output_path.replace(".pdf", "_manifest.json")
+
+
+def get_build_modules():
+    """
+    Source files of the project modules imported so far, those of the build once it ran. config.py is left out, its
+    options are compared instead, and so are the scripts running the build (__main__, aliased by multiprocessing).
+    """
+    code_root = os.path.dirname(os.path.abspath(config.__file__))
+    return sorted(os.path.relpath(module.__file__) for name, module in list(sys.modules.items())
+                  if name not in ("__main__", "__mp_main__", "config") and getattr(module, "__file__", None)
+                  and os.path.dirname(os.path.abspath(module.__file__)) == code_root)
+
+
+def get_input_files(source_path):
+    """The data files the build reads: spreadsheet, resources, rendered translations and fonts."""
+    files = [source_path, config.MUSHAF_RES, config.MUSHAF_META, config.QURAN_TEXT, config.UTH_TO_SIMPLE]
+    files += [config.TRANSLATION_FILES[language] for language in config.RENDERED_TRANSLATIONS]
+    files += sorted(glob.glob(os.path.join(config.FONT_ROOT, "*.ttf")))
+    return files
+
+
+def get_effective_config():
+    """repr of every option of config.py changing the output."""
+    return {name: repr(value) for name, value in vars(config).items()
+            if name.isupper() and name not in NON_OUTPUT_OPTIONS and not isinstance(value, (types.FunctionType, types.ModuleType))}
+
+
+def hash_files(paths, previous_files=None):
+    """{path: {size, mtime_ns, sha1}}, the sha1 of previous_files is kept when the size and modification time match."""
+    previous_files = previous_files or {}
+    files = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            files[path] = None
+            continue
+        previous = previous_files.get(path)
+        if previous and (previous["size"], previous["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            digest = previous["sha1"]
+        else:
+            with open(path, "rb") as f:
+                digest = hashlib.file_digest(f, "sha1").hexdigest()
+        files[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest}
+    return files
+
+
+def find_previous_manifest(output_path):
+    """Manifest of the last build with the same layout options (the date prefix of the output may differ)."""
+    flags = os.path.basename(output_path).split("_", 1)[1]
+    manifests = glob.glob(os.path.join(os.path.dirname(output_path), f"*_{get_manifest_path(flags)}"))
+    return max(manifests, key=os.path.getmtime) if manifests else None
+
+
+def diff_inputs(previous, current):
+    """Inputs added, removed or changed between two manifests, as readable lines."""
+    differences = []
+    for kind, key in (("file", "files"), ("option", "config")):
+        previous_inputs, current_inputs = previous.get(key, {}), current[key]
+        for name in sorted(previous_inputs.keys() | current_inputs.keys()):
+            if name not in previous_inputs:
+                differences.append(f"{kind} {name} added")
+            elif name not in current_inputs:
+                differences.append(f"{kind} {name} removed")
+            elif kind == "file" and (previous_inputs[name] or {}).get("sha1") != (current_inputs[name] or {}).get("sha1"):
+                differences.append(f"file {name} changed")
+            elif kind == "option" and previous_inputs[name] != current_inputs[name]:
+                differences.append(f"option {name} changed: {previous_inputs[name]} -> {current_inputs[name]}")
+    return differences
+
+
+class BuildManifest:
+    """Inputs of the build of output_path, compared with the manifest of the last build with the same options."""
+
+    def __init__(self, output_path, source_path=config.INPUT_DATA):
+        self.output_path = output_path
+        self.previous_path = find_previous_manifest(output_path)
+        self.previous = {}
+        if self.previous_path:
+            with open(self.previous_path, encoding="utf-8") as f:
+                self.previous = json.load(f)
+        # the modules imported by the last build, the rendering stages are not imported before the check (main.py):
+        # importing another module takes a change of one of them or of an option
+        previous_modules = [path for path in self.previous.get("files", {}) if path.endswith(".py")]
+        files = get_input_files(source_path) + sorted(set(get_build_modules() + previous_modules))
+        self.inputs = {"files": hash_files(files, self.previous.get("files")), "config": get_effective_config()}
+
+    def get_changed_outputs(self):
+        """Files of the last build missing or overwritten since (by the watch mode or a build without manifest)."""
+        previous_dir = os.path.dirname(self.previous_path)
+        recorded = {os.path.join(previous_dir, name): output for name, output in self.previous["outputs"].items()}
+        current = hash_files(recorded, recorded)
+        return [f"output {os.path.basename(path)} {'missing' if current[path] is None else 'changed'}"
+                for path in recorded if current[path] is None or current[path]["sha1"] != recorded[path]["sha1"]]
+
+    def get_differences(self):
+        if not self.previous:
+            return ["no previous build with these options"]
+        return diff_inputs(self.previous, self.inputs) + self.get_changed_outputs()
+
+    def reuse_previous_build(self):
+        """Copies the outputs of the last build when no input changed, returns whether the render can be skipped."""
+        differences = self.get_differences()
+        if differences:
+            logging.info(f"Building {self.output_path}: {'; '.join(differences)}")
+            return False
+        previous_dir = os.path.dirname(self.previous_path)
+        previous_stem, stem = self.previous["output"][:-len(".pdf")], self.output_path[:-len(".pdf")]
+        output_paths = [stem + name[len(previous_stem):] for name in self.previous["outputs"]]
+        if os.path.join(previous_dir, self.previous["output"]) != self.output_path:
+            for name, output_path in zip(self.previous["outputs"], output_paths):
+                shutil.copyfile(os.path.join(previous_dir, name), output_path)
+        # the new modification times are saved as well, so touched files are not hashed again
+        self.write(output_paths)
+        logging.info(f"No input changed since the build of {self.previous['output']}, {self.output_path} reused")
+        return True
+
+    def save(self, output_paths):
+        """Saves the manifest of the finished build next to its output, with the modules the build imported."""
+        modules = set(get_build_modules())
+        files = {path: file for path, file in self.inputs["files"].items() if not path.endswith(".py") or path in modules}
+        files.update(hash_files(sorted(modules - files.keys())))
+        self.inputs["files"] = files
+        self.write(output_paths)
+
+    def write(self, output_paths):
+        """Writes the manifest next to the output, with the hashes of the written files."""
+        outputs = hash_files(output_paths)
+        manifest = {"output": os.path.basename(self.output_path),
+                    "outputs": {os.path.basename(path): output for path, output in outputs.items()},
+                    **self.inputs}
+        path = get_manifest_path(self.output_path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+
+def get_build_manifest(output_path, source_path=config.INPUT_DATA, preview=None):
+    """The manifest of a full build with BUILD_MANIFEST, None otherwise (previews are always built)."""
+    return BuildManifest(output_path, source_path) if config.BUILD_MANIFEST and preview is None else None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    build_differences = BuildManifest(config.get_output_pdf(preview=False)).get_differences()
+    for difference in build_differences:
+        print(difference)
+    sys.exit(1 if build_differences else 0)
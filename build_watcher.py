@@ -0,0 +1,130 @@
+# build_watcher.py
+"""
+Watch mode: keeps the fonts, the Quran text/font alignment and the translations loaded, and rebuilds the PDF each
+time the input spreadsheet or config.py is saved:
+
+    python build_watcher.py
+
+A spreadsheet change only re-reads the spreadsheet. A config.py change reloads the configuration and the modules
+using it, the resources are loaded again only when a resource option (paths, fonts, text layer) changed.
+A failing build is logged and the watcher keeps running.
+"""
+import importlib
+import logging
+import os
+import sys
+import time
+
+import config
+
+# modules reading config values at import time, in dependency order
+CONFIG_DEPENDENT_MODULES = ["quran_data", "utils", "canonicalization_cache", "corpus_db", "fonts_helper", "glyph_coverage",
+                            "flowables_helper", "styles_helpers", "xobjects_helper", "headers_helpers", "bookmarks_helper",
+                            "layout_profiler", "compression_canvas", "streaming_canvas", "pdf_postprocess", "preview_helper",
+                            "resources_loader", "corpus_stats", "appendix_helper", "build_manifest", "pdf_generation"]
+# options of the warm state, the resources are loaded again when one of them changes
+RESOURCE_OPTIONS = ["INPUT_DATA", "MUSHAF_RES", "MUSHAF_META", "QURAN_TEXT", "UTH_TO_SIMPLE", "FONT_ROOT",
+                    "TRANSLATION_FILES", "QURAN_TEXT_LAYER"]
+
+
+def get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def get_resource_options():
+    return {name: getattr(config, name) for name in RESOURCE_OPTIONS}
+
+
+class BuildWatcher:
+    def __init__(self, interval=config.WATCH_INTERVAL):
+        self.interval = interval
+        self.q_mapper = None
+        self.trans_lookup = None
+        self.meta = None
+        self.resource_options = None
+
+    def load_resources(self):
+        """Loads and registers everything once, the spreadsheet is read again on every build."""
+        resources_loader = importlib.import_module("resources_loader")
+        quran_data = importlib.import_module("quran_data")
+        _, self.q_mapper, self.trans_lookup = resources_loader.preload_resources(config.INPUT_DATA)
+        self.meta = quran_data.load_quran_meta()
+        self.resource_options = get_resource_options()
+
+    def load_source_data(self):
+        resources_loader = importlib.import_module("resources_loader")
+        utils = importlib.import_module("utils")
+        if importlib.import_module("corpus_db").is_corpus_db(config.INPUT_DATA):
+            # only the ayas of the selected entries are loaded from the database
+            source_data, self.q_mapper, self.trans_lookup = resources_loader.load_resources_from_db(
+                config.INPUT_DATA, config.SOURCE_ROOTS, config.SOURCE_SURAS)
+            return source_data
+        records = utils.filter_source_records(utils.read_source_records(config.INPUT_DATA), config.SOURCE_ROOTS, config.SOURCE_SURAS)
+        return utils.load_source_data(config.INPUT_DATA, records=records, meta=self.meta)
+
+    def reload_config(self):
+        importlib.reload(config)
+        for module_name in CONFIG_DEPENDENT_MODULES:
+            if module_name in sys.modules:
+                importlib.reload(sys.modules[module_name])
+        if get_resource_options() != self.resource_options:
+            logging.info("Resource options changed, loading the resources again")
+            self.load_resources()
+        else:
+            # same parsed translations, with the reloaded class and its rendered languages
+            self.trans_lookup = sys.modules["quran_data"].TranslationRegistry(lookups=self.trans_lookup.lookups)
+
+    def build(self):
+        start = time.time()
+        try:
+            # the resources stay loaded for the whole book, a preview only renders the selected roots
+            preview = importlib.import_module("preview_helper").get_preview_filter()
+            source_data = self.load_source_data()
+            if preview is not None:
+                source_data = preview.select(source_data)
+            output_path = config.get_output_pdf(preview=preview is not None)
+            importlib.import_module("pdf_generation").render_pdf(source_data, self.q_mapper, self.trans_lookup, output_path,
+                                                                 export=preview is None)
+            logging.info(f"{output_path} rebuilt in {time.time() - start:.2f}s")
+        except Exception:
+            logging.exception("Build failed, waiting for the next change")
+
+    def wait_for_change(self, watched):
+        """Polls the watched files until one of them changes and its modification time settles (editors save in steps)."""
+        while True:
+            time.sleep(self.interval)
+            changed = [path for path, mtime in watched.items() if get_mtime(path) != mtime]
+            if changed:
+                while True:
+                    mtimes = {path: get_mtime(path) for path in changed}
+                    time.sleep(self.interval)
+                    if all(get_mtime(path) == mtime is not None for path, mtime in mtimes.items()):
+                        return changed
+
+    def run(self):
+        self.load_resources()
+        self.build()
+        config_path = config.__file__
+        while True:
+            watched = {path: get_mtime(path) for path in [config.INPUT_DATA, config_path]}
+            logging.info(f"Watching {', '.join(watched)} for changes")
+            changed = self.wait_for_change(watched)
+            logging.info(f"{', '.join(changed)} changed")
+            if config_path in changed:
+                try:
+                    self.reload_config()
+                except Exception:
+                    logging.exception("config.py could not be reloaded, waiting for the next change")
+                    continue
+            self.build()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    try:
+        BuildWatcher().run()
+    except KeyboardInterrupt:
+        pass
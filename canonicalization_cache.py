@@ -0,0 +1,74 @@
+# canonicalization_cache.py
+"""
+Persistent cache of the word positions resolved by canonicalize_entered_words.
+
+Each (sura, aya, word) triple of the spreadsheet is fuzzy matched once, its resolution (token index, font symbol,
+simple/Uthmani equivalents and match score) is saved along with the corpus version, so the next builds only match
+the new or edited rows. The whole cache is dropped when the corpus resources or the matcher change.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from config import CANONICALIZATION_CACHE, MUSHAF_RES, QURAN_TEXT, UTH_TO_SIMPLE
+
+MATCHER_VERSION = 1  # bump when find_token_index matches differently
+
+
+def get_corpus_version(paths=(MUSHAF_RES, QURAN_TEXT, UTH_TO_SIMPLE)):
+    """Hash of the resource files the token positions are resolved against, and of the matcher version."""
+    digest = hashlib.sha1(f"matcher-{MATCHER_VERSION}".encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(hashlib.file_digest(f, "sha1").digest())
+    return digest.hexdigest()
+
+
+class CanonicalizationCache:
+    """{(sura, aya, word): resolution} dict persisted as JSON, with hit statistics of the current run."""
+
+    def __init__(self, path=CANONICALIZATION_CACHE, corpus_version=None):
+        self.path = path
+        self.corpus_version = corpus_version or (get_corpus_version() if path else None)
+        self.resolutions = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("corpus_version") == self.corpus_version:
+                self.resolutions = cached["resolutions"]
+            else:
+                logging.info(f"{path} was built for another corpus version, all the words will be matched again")
+
+    @staticmethod
+    def get_key(sura, aya, word):
+        return f"{sura}:{aya}:{word}"
+
+    def get(self, sura, aya, word):
+        resolution = self.resolutions.get(self.get_key(sura, aya, word))
+        if resolution is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return resolution
+
+    def put(self, sura, aya, word, resolution):
+        self.resolutions[self.get_key(sura, aya, word)] = resolution
+
+    def save(self):
+        """Writes the cache when new words were matched, through a temporary file so an interrupted run can't corrupt it."""
+        if not self.path or not self.misses:
+            return
+        # unique temporary file, concurrent builds of one process may save at the same time
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump({"corpus_version": self.corpus_version, "resolutions": self.resolutions}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        hit_ratio = self.hits / total if total else 0
+        logging.info(f"Canonicalization cache: {self.hits}/{total} hits ({hit_ratio:.1%}), {self.misses} words matched")
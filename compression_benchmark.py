@@ -0,0 +1,57 @@
+"""
+Save-time benchmark of the parallel compression: the book is rendered once per worker count, the time of the final
+save (deflating, formatting and writing the PDF) is printed with the output size, and the output is compared with
+the serial (0 workers) one, which must be byte-identical at the same level:
+
+    python compression_benchmark.py [level] [workers ...]
+"""
+import hashlib
+import io
+import logging
+import sys
+import time
+from functools import partial
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+
+from compression_canvas import ParallelCompressionCanvas
+from config import COMPRESSION_LEVEL, INPUT_DATA, BuildOptions
+from pdf_generation import generate_content_tables, render_document, get_entries_per_table
+from resources_loader import preload_resources
+
+WORKER_COUNTS = [0, 2, 4, 8]
+
+
+class TimedCanvas(ParallelCompressionCanvas):
+    save_seconds = []
+
+    def save(self):
+        start = time.perf_counter()
+        super().save()
+        TimedCanvas.save_seconds.append(time.perf_counter() - start)
+
+
+def run_benchmark(level=COMPRESSION_LEVEL, worker_counts=WORKER_COUNTS):
+    # no timestamps or random IDs, so the outputs can be compared
+    rl_config.invariant = 1
+    source_data, q_mapper, trans_lookup = preload_resources(INPUT_DATA)
+    entries_per_table = get_entries_per_table(source_data, BuildOptions())
+    content_tables = generate_content_tables(source_data, A4[0], q_mapper, trans_lookup, export=False)
+
+    print(f"{'workers':<10}{'save s':>10}{'size MB':>10}  identical to serial")
+    serial_digest = None
+    for workers in [0] + [workers for workers in worker_counts if workers]:
+        output = io.BytesIO()
+        canvas_maker = partial(TimedCanvas, compression_level=level, compression_workers=workers)
+        render_document(content_tables, source_data, entries_per_table, output, canvas_maker)
+        digest = hashlib.sha1(output.getvalue()).hexdigest()
+        serial_digest = serial_digest or digest
+        print(f"{workers:<10}{TimedCanvas.save_seconds[-1]:>10.2f}{len(output.getvalue()) / 2 ** 20:>10.2f}  "
+              f"{digest == serial_digest}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    args = [int(arg) for arg in sys.argv[1:]]
+    run_benchmark(*args[:1], *([args[1:]] if args[1:] else []))
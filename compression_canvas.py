@@ -0,0 +1,114 @@
+# compression_canvas.py
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab import rl_config
+from reportlab.pdfbase.pdfdoc import PDFStream, PDFArray, PDFName, PDFBase85Encode, PDFZCompress
+from reportlab.pdfgen import canvas
+
+from config import COMPRESSION_LEVEL, COMPRESSION_WORKERS
+
+_executors = {}  # workers -> ProcessPoolExecutor, see get_executor
+_executors_lock = threading.Lock()
+
+
+def get_pending_streams(doc):
+    """
+    Streams ReportLab would encode while formatting the document: the page streams (their PDFStream is created at
+    format time, so it is created here the same way) and the registered streams (font subsets, ToUnicode CMaps).
+    """
+    streams = []
+    for page in doc.Pages.pages:
+        if page.Contents or not page.stream or not page.compression or page.Override_default_compilation:
+            continue
+        page.Contents = PDFStream(content=page.stream,
+                                  filters=rl_config.useA85 and [PDFBase85Encode, PDFZCompress] or [PDFZCompress])
+        page.Contents.__Comment__ = "page stream"
+        streams.append(page.Contents)
+    for obj in doc.idToObject.values():
+        if (isinstance(obj, PDFStream) and obj.content is not None and obj.filters and "Filter" not in obj.dictionary.dict
+                and all(stream_filter in (PDFZCompress, PDFBase85Encode) for stream_filter in obj.filters)):
+            streams.append(obj)
+    return streams
+
+
+def encode_content(content, filter_names, level):
+    """Applies the filters in reverse order as PDFStream.format does, deflating at the given level (runs in the workers)."""
+    for filter_name in reversed(filter_names):
+        if filter_name == PDFZCompress.pdfname:
+            content = zlib.compress(content.encode("utf8") if isinstance(content, str) else content, level)
+        else:
+            content = PDFBase85Encode.encode(content)
+    return content
+
+
+def get_executor(workers):
+    """
+    Process pool shared by every save with this number of workers (concurrent builds in threads included). The
+    workers are started by a fork server, forking the multi-threaded build process itself could deadlock them.
+    """
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+        return _executors[workers]
+
+
+def compress_streams(streams, level=COMPRESSION_LEVEL, workers=COMPRESSION_WORKERS):
+    """
+    Encodes the streams in worker processes (the Base85 encoding of the page streams is pure Python) and sets their
+    Filter entry as PDFStream.format would, so the formatted document is byte-identical to the serial one at the same
+    level. workers=None uses one per CPU, with 0 or 1 they are encoded in the calling process.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    contents = [stream.content for stream in streams]
+    filter_names = [[stream_filter.pdfname for stream_filter in stream.filters] for stream in streams]
+    if workers > 1:
+        encoded = list(get_executor(workers).map(encode_content, contents, filter_names, [level] * len(streams), chunksize=16))
+    else:
+        encoded = list(map(encode_content, contents, filter_names, [level] * len(streams)))
+    for stream, content, names in zip(streams, encoded, filter_names):
+        stream.content = content
+        stream.dictionary["Filter"] = PDFArray([PDFName(name) for name in names])
+    return sum(map(len, contents)), sum(map(len, encoded))
+
+
+class ParallelCompressionCanvas(canvas.Canvas):
+    """
+    Canvas encoding the page streams and the font subsets of the document together on save, at COMPRESSION_LEVEL and
+    in a worker pool with COMPRESSION_WORKERS, instead of one after the other while the PDF is formatted.
+    """
+
+    def __init__(self, *args, compression_level=COMPRESSION_LEVEL, compression_workers=COMPRESSION_WORKERS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compression_level = compression_level
+        self.compression_workers = compression_workers
+
+    def compress_pending_streams(self):
+        if len(self._code):
+            self.showPage()
+        if not self._doc.compression:
+            return
+        start = time.perf_counter()
+        # the font subsets are embedded here instead of at the start of GetPDFData, in the same order
+        for font in self._doc.delayedFonts:
+            font.addObjects(self._doc)
+        self._doc.delayedFonts = []
+        streams = get_pending_streams(self._doc)
+        raw_size, compressed_size = compress_streams(streams, self.compression_level, self.compression_workers)
+        logging.debug(f"{len(streams)} streams encoded from {raw_size / 2 ** 20:.1f}MB to {compressed_size / 2 ** 20:.1f}MB "
+                      f"(level {self.compression_level}, {self.compression_workers} workers) "
+                      f"in {time.perf_counter() - start:.2f}s")
+
+    def save(self):
+        self.compress_pending_streams()
+        super().save()
+
+    def getpdfdata(self):
+        self.compress_pending_streams()
+        return super().getpdfdata()
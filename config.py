@@ -1,17 +1,55 @@
 from datetime import datetime
 
-from reportlab.lib import colors
-
-current_date = datetime.now().strftime("%Y%m%d")
 #######################################
 # input and output
-INPUT_DATA = "resources/data.xlsx"
+INPUT_DATA = "resources/data.xlsx"  # or a database built by corpus_db.py (CORPUS_DB)
+# build only a subset of the entries, None for all (indexed queries when reading from the database)
+SOURCE_ROOTS = None  # e.g. ["أ ب د"]
+SOURCE_SURAS = None  # 1-based sura numbers, e.g. [2, 3]
+# quick preview of a few roots (saved as *_preview.pdf): only their tables are rendered and only their fonts registered
+PREVIEW_ROOTS = None  # exact roots, e.g. ["أ ب د"]
+PREVIEW_LETTERS = None  # ranges of first root letters, e.g. [("أ", "ب")]
+PREVIEW_PAGES = None  # (first, last) pages of the last full build, read from its *_layout.json, e.g. (10, 12)
 # options for generated file
 PDF_TITLE = "Sample PDF Title"
 PDF_AUTHOR = "Your Name"
 PDF_SUBJECT = "PDF Subject"
 PDF_KEYWORDS = "PDF, ReportLab, Metadata"
 PDF_CREATOR = "Your Application Name"
+# flush finished page streams to a temporary file instead of keeping them in memory until save, and write the PDF
+# object by object instead of assembling it in memory
+STREAMING_OUTPUT = False
+# zlib level (1-9) of the page streams and font subsets, 6 is ReportLab's (zlib default) level
+COMPRESSION_LEVEL = 6
+# worker processes compressing the page streams and font subsets on save, None for one per CPU, 0 or 1 to compress them
+# one after the other (the default, measure the gain first with python compression_benchmark.py)
+COMPRESSION_WORKERS = 0
+# draw repeated headers once as PDF Form XObjects and reference them on every page
+REUSE_FORM_XOBJECTS = True
+# map the QPC glyphs to their Uthmani tokens in the embedded fonts, so the Quran text can be copied and searched
+QURAN_TEXT_LAYER = True
+# rewrite the output as a linearized ("fast web view") PDF so browsers can show the first page before the download ends
+LINEARIZE_OUTPUT = False
+# split the book into one volume per first root letter, plus a JSON index of every root's volume and page
+SPLIT_VOLUMES = False
+# count and time the wrap/split/drawOn calls per flowable class and per root, the summary is logged after the build
+PROFILE_LAYOUT = False
+# check that every QPC page font has a glyph for each symbol of its page in MUSHAF_RES before loading the fonts
+CHECK_GLYPH_COVERAGE = True
+# JSON report of the glyph coverage check (python glyph_coverage.py)
+GLYPH_COVERAGE_REPORT = "output/glyph_coverage_report.json"
+# append root/word frequency tables (per root, sura and Mushaf page) to the book, and export them as CSV files
+STATS_APPENDIX = False
+STATS_CSV_DIR = "output/stats"
+# save the hashes of the build inputs next to the output (*_manifest.json), and reuse the last book when none changed
+BUILD_MANIFEST = True
+# JSON report of the validation-only mode (python input_validation.py)
+VALIDATION_REPORT = "output/validation_report.json"
+# polling interval in seconds of the watch mode (python build_watcher.py)
+WATCH_INTERVAL = 0.5
+# address of the local lookup service (python lookup_service.py)
+LOOKUP_SERVICE_HOST = "127.0.0.1"
+LOOKUP_SERVICE_PORT = 8765
 #######################################
 # resource files
 MUSHAF_RES = "resources/mushaf.txt"
@@ -20,6 +58,18 @@ QURAN_TEXT = "resources/quran-uthmani.xml"
 UTH_TO_SIMPLE = "resources/Uthmani to Simple Mapping.html"
 TRANSLATION_XML = "resources/english_translation.xml"
 FONT_ROOT = "resources/fonts"
+# generated by binary_corpus.py from the resources above
+BINARY_CORPUS = "resources/quran_corpus.bin"
+CORPUS_DB = "resources/quran_corpus.db"
+TRANSLATION_LANGUAGE = "en"  # language of TRANSLATION_XML
+# translation files by language (tanzil format), a file is parsed only when its language is rendered or looked up
+TRANSLATION_FILES = {TRANSLATION_LANGUAGE: TRANSLATION_XML}  # e.g. add "fr": "resources/french_translation.xml"
+# translations rendered under each aya (non-Arabic layout), in order
+RENDERED_TRANSLATIONS = [TRANSLATION_LANGUAGE]
+# resolved positions of the spreadsheet words, reused while the corpus resources don't change, None to disable
+CANONICALIZATION_CACHE = "resources/canonicalization_cache.json"
+# code points of the QPC page fonts cmaps by font hash, for the glyph coverage check, None to disable
+GLYPH_COVERAGE_CACHE = "resources/glyph_coverage_cache.json"
 #######################################
 # fonts options
 GENERAL_ARABIC_FONT = "NotoNaskhArabic-SemiBold"
@@ -37,12 +87,6 @@ NotoNaskhArabic-VariableFont_wght
 
 QURAN_FONT_SIZE = 8
 ###################################
-# color options
-ROOT_HEADER_BK_COLOR = colors.beige
-TABLE_BK_COLOR = colors.white
-ROOT_BORDER_COLOR = colors.Color(red=0, green=0, blue=0)
-ROOT_BG_COLOR = colors.Color(red=0.8, green=0.2, blue=0.0, alpha=0.1)
-###################################
 # layout options
 IS_ARABIC = False  # Globalisation
 
@@ -79,9 +123,43 @@ GENERAL_TABLE_RATIOS_SINGLE = [.75, 1.5, .75, 8, 1, .5, ]  # 6 columns design
 HEADER_TABLE_RATIOS_SINGLE = [6, 14.3, 6, .99]
 
 SINGLE_COLUMN = True
+# double column mode only: flow the entries down the right then the left column of every page (two frames) instead of
+# pairing two unrelated entries per table row, the table columns are the first half of GENERAL_TABLE_RATIOS_DOUBLE
+COLUMN_FLOW = False
+# one entry per table row, in the single column mode and in the column flow
+ONE_ENTRY_PER_ROW = SINGLE_COLUMN or COLUMN_FLOW
+###################################
+
+
+class BuildOptions:
+    """
+    Layout, profiling and compression options of one build, the options above by default. Passed down the build
+    (pdf_generation.build_pdf_bytes) so concurrent builds in one process can use different options.
+    """
+
+    def __init__(self, single_column=SINGLE_COLUMN, column_flow=COLUMN_FLOW, is_arabic=IS_ARABIC,
+                 profile_layout=PROFILE_LAYOUT, compression_level=COMPRESSION_LEVEL,
+                 compression_workers=COMPRESSION_WORKERS):
+        self.single_column = single_column
+        self.column_flow = column_flow
+        self.one_entry_per_row = single_column or column_flow
+        self.is_arabic = is_arabic
+        self.half_header = HEADER_NAMES_AR if is_arabic else HEADER_NAMES_EN
+        self.header_padding = HEADER_PADDING_AR if is_arabic else HEADER_PADDING_EN
+        self.general_font_size = GENERAL_FONT_SIZE_AR if is_arabic else GENERAL_FONT_SIZE_NON_AR
+        self.general_font = GENERAL_ARABIC_FONT if is_arabic else GENERAL_ENGLISH_FONT
+        self.profile_layout = profile_layout
+        self.compression_level = compression_level
+        self.compression_workers = compression_workers
 ###################################
 # FOR TESTING
 DATA_REPEAT_MULTIPLIER = 1
 
-# Dynamically create the output PDF filename based on date and conditions
-OUTPUT_PDF = f"output/{current_date}_{'single' if SINGLE_COLUMN else 'double'}_{'arabic' if IS_ARABIC else 'non-arabic'}_{'sep' if QURAN_ROW_SEPARATOR else 'nosep'}.pdf"
+
+def get_output_pdf(preview=None):
+    """Dynamically create the output PDF filename based on the build date and conditions."""
+    if preview is None:
+        preview = bool(PREVIEW_ROOTS or PREVIEW_LETTERS or PREVIEW_PAGES)
+    current_date = datetime.now().strftime("%Y%m%d")
+    column_layout = 'single' if SINGLE_COLUMN else 'flow' if COLUMN_FLOW else 'double'
+    return f"output/{current_date}_{column_layout}_{'arabic' if IS_ARABIC else 'non-arabic'}_{'sep' if QURAN_ROW_SEPARATOR else 'nosep'}{'_preview' if preview else ''}.pdf"
@@ -0,0 +1,143 @@
+# corpus_db.py
+"""
+Single indexed SQLite database of every input: the ayas with their font ids and glyph symbols, the tokens,
+the translations, the sura metadata and the spreadsheet entries (roots).
+
+Sura and aya numbers are stored 1-based like the source files, the loaders return the same structures as
+load_quran_meta, read_source_records, create_font_text_mapping and parse_translation, so a build can use the
+database instead of parsing every file, optionally for a subset of roots or suras only.
+"""
+import sqlite3
+import sys
+from collections import defaultdict
+from contextlib import closing
+
+from config import CORPUS_DB, INPUT_DATA, TRANSLATION_FILES, TRANSLATION_LANGUAGE
+
+SCHEMA = """
+CREATE TABLE suras (sura INTEGER PRIMARY KEY, name_ar TEXT, name_en TEXT, start INTEGER, ayas INTEGER);
+CREATE TABLE ayas (sura INTEGER, aya INTEGER, font_id TEXT, symbols TEXT, PRIMARY KEY (sura, aya));
+CREATE TABLE tokens (sura INTEGER, aya INTEGER, token_idx INTEGER, symbol TEXT, uthmani TEXT, simple TEXT,
+                     PRIMARY KEY (sura, aya, token_idx));
+CREATE TABLE translations (language TEXT, sura INTEGER, aya INTEGER, text TEXT, PRIMARY KEY (language, sura, aya));
+CREATE TABLE entries (id INTEGER PRIMARY KEY, root TEXT, sura_no INTEGER, aya_no INTEGER, word TEXT, word_en TEXT);
+CREATE INDEX entries_root ON entries (root);
+CREATE INDEX entries_sura ON entries (sura_no, aya_no);
+CREATE INDEX tokens_symbol ON tokens (symbol);
+"""
+
+
+def is_corpus_db(path):
+    return path.endswith(".db")
+
+
+def build_corpus_db(path=CORPUS_DB, source_path=INPUT_DATA):
+    """Imports the spreadsheet and all the resource files into a new SQLite database at path."""
+    from quran_data import load_quran_meta, create_font_text_mapping, parse_translation
+    from utils import read_source_records
+
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executescript("".join(f"DROP TABLE IF EXISTS {table};" for table in ["suras", "ayas", "tokens", "translations", "entries"]))
+        connection.executescript(SCHEMA)
+
+        connection.executemany("INSERT INTO suras VALUES (?, ?, ?, ?, ?)", [
+            (int(sura["@index"]), sura["@name"], sura["@ename"], int(sura["@start"]), int(sura["@ayas"]))
+            for sura in load_quran_meta()["quran"]["suras"]["sura"]
+        ])
+
+        q_mapper = create_font_text_mapping()
+        connection.executemany("INSERT INTO ayas VALUES (?, ?, ?, ?)", [
+            (sura + 1, aya + 1, meta["font_id"], "".join(meta["symbols"]))
+            for (sura, aya), meta in q_mapper.items()
+        ])
+        connection.executemany("INSERT INTO tokens VALUES (?, ?, ?, ?, ?, ?)", [
+            (sura + 1, aya + 1, token_idx, symbol, uthmani, simple)
+            for (sura, aya), meta in q_mapper.items()
+            for token_idx, (symbol, uthmani, simple) in enumerate(zip(meta["symbols"], meta["uthmani"], meta["simple"]))
+        ])
+
+        connection.executemany("INSERT INTO translations VALUES (?, ?, ?, ?)", [
+            (language, sura + 1, aya + 1, text)
+            for language, translation_path in TRANSLATION_FILES.items()
+            for (sura, aya), text in parse_translation(translation_path).items()
+        ])
+
+        connection.executemany("INSERT INTO entries (root, sura_no, aya_no, word, word_en) VALUES (?, ?, ?, ?, ?)", [
+            (record["root"], record["sura_no"], record["aya_no"], record["word"], record["word_en"])
+            for record in read_source_records(source_path)
+        ])
+    connection.close()
+    return path
+
+
+def connect(path=CORPUS_DB):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def subset_condition(column, values):
+    values = list(values or [])
+    return f"{column} IN ({', '.join('?' * len(values))})" if values else "1", values
+
+
+def load_source_records_from_db(path=CORPUS_DB, roots=None, suras=None):
+    """Reads the spreadsheet entries (1-based sura/aya as in the spreadsheet), optionally for some roots or suras."""
+    roots_condition, roots_values = subset_condition("root", roots)
+    suras_condition, suras_values = subset_condition("sura_no", suras)
+    with closing(connect(path)) as connection:
+        rows = connection.execute(f"SELECT sura_no, aya_no, word, root, word_en FROM entries "
+                                  f"WHERE {roots_condition} AND {suras_condition} ORDER BY id",
+                                  roots_values + suras_values).fetchall()
+    return [{"sura_no": sura, "aya_no": aya, "word": word, "root": root, "word_en": word_en}
+            for sura, aya, word, root, word_en in rows]
+
+
+def load_quran_meta_from_db(path=CORPUS_DB):
+    """Returns the sura metadata in the same structure as load_quran_meta."""
+    with closing(connect(path)) as connection:
+        rows = connection.execute("SELECT sura, name_ar, name_en, start, ayas FROM suras ORDER BY sura").fetchall()
+    return {"quran": {"suras": {"sura": [
+        {"@index": str(sura), "@name": name_ar, "@ename": name_en, "@start": str(start), "@ayas": str(ayas)}
+        for sura, name_ar, name_en, start, ayas in rows
+    ]}}}
+
+
+def load_font_text_mapping_from_db(path=CORPUS_DB, ayas=None):
+    """Same lookup as create_font_text_mapping, for all ayas or only the given 0-based (sura, aya) keys."""
+    lookup = defaultdict(lambda: {"symbols": "", "font_id": "p1"})
+    with closing(connect(path)) as connection:
+        if ayas is None:
+            aya_rows = connection.execute("SELECT sura, aya, font_id, symbols FROM ayas").fetchall()
+            token_rows = connection.execute("SELECT sura, aya, uthmani, simple FROM tokens ORDER BY sura, aya, token_idx").fetchall()
+        else:
+            aya_rows, token_rows = [], []
+            for sura, aya in sorted(set(ayas)):
+                aya_rows += connection.execute("SELECT sura, aya, font_id, symbols FROM ayas WHERE sura = ? AND aya = ?",
+                                               (sura + 1, aya + 1)).fetchall()
+                token_rows += connection.execute("SELECT sura, aya, uthmani, simple FROM tokens WHERE sura = ? AND aya = ? ORDER BY token_idx",
+                                                 (sura + 1, aya + 1)).fetchall()
+    for sura, aya, font_id, symbols in aya_rows:
+        lookup[sura - 1, aya - 1] = {"symbols": list(symbols), "uthmani": [], "font_id": font_id, "simple": []}
+    for sura, aya, uthmani, simple in token_rows:
+        lookup[sura - 1, aya - 1]["uthmani"].append(uthmani)
+        lookup[sura - 1, aya - 1]["simple"].append(simple)
+    return lookup
+
+
+def load_translations_from_db(path=CORPUS_DB, language=TRANSLATION_LANGUAGE, ayas=None):
+    """Same plain {(sura, aya): text} dict as parse_translation, for all ayas or only the given 0-based keys."""
+    with closing(connect(path)) as connection:
+        if ayas is None:
+            rows = connection.execute("SELECT sura, aya, text FROM translations WHERE language = ?", (language,)).fetchall()
+        else:
+            rows = []
+            for sura, aya in sorted(set(ayas)):
+                rows += connection.execute("SELECT sura, aya, text FROM translations WHERE language = ? AND sura = ? AND aya = ?",
+                                           (language, sura + 1, aya + 1)).fetchall()
+    return {(sura - 1, aya - 1): text for sura, aya, text in rows}
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else CORPUS_DB
+    build_corpus_db(db_path)
+    print(f"{db_path} has been saved")
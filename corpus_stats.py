@@ -0,0 +1,103 @@
+# corpus_stats.py
+"""
+Root and word frequency statistics of the index, computed on columnar (pandas/NumPy) copies of the entries and of
+the corpus tokens with vectorized group-bys:
+
+    roots   entries, ayas, suras and distinct words of every root, and the corpus occurrences of these words
+    suras   entries, roots and corpus tokens of every sura with entries, entries per 1000 tokens
+    pages   the same per Mushaf page (QPC page font)
+    words   entries and corpus occurrences of every (root, word)
+
+They are appended to the book (STATS_APPENDIX) and exported as CSV files, alone with:
+
+    python corpus_stats.py [output directory]
+"""
+import logging
+import os
+import sys
+import time
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from config import INPUT_DATA, STATS_CSV_DIR
+
+
+def get_entries_frame(source_data):
+    """One row per canonicalized entry (padding entries excluded), sura and aya 1-based, page of the QPC font."""
+    entries = [(root, entry["sura_no"], entry["aya_no"], entry["word"], entry["simple_equivalent"], entry["word_font_id"])
+               for root, root_entries in source_data for entry in root_entries if entry["sura_no"] is not None]
+    frame = pd.DataFrame(entries, columns=["root", "sura", "aya", "word", "simple", "font_id"])
+    frame["sura"] += 1
+    frame["aya"] += 1
+    frame["page"] = frame.pop("font_id").str[1:].astype(np.int32)
+    return frame
+
+
+def get_tokens_frame(q_mapper):
+    """One row per token of the corpus, built column by column from the aya token lists."""
+    ayas = [(sura, aya, meta_data) for (sura, aya), meta_data in list(q_mapper.items())
+            if "simple" in meta_data]  # missing keys looked up in the defaultdict
+    counts = np.fromiter((len(meta_data["simple"]) for _, _, meta_data in ayas), dtype=np.int32, count=len(ayas))
+    pages = np.fromiter((int(meta_data["font_id"][1:]) for _, _, meta_data in ayas), dtype=np.int32, count=len(ayas))
+    suras = np.fromiter((sura for sura, _, _ in ayas), dtype=np.int32, count=len(ayas))
+    aya_numbers = np.fromiter((aya for _, aya, _ in ayas), dtype=np.int32, count=len(ayas))
+    return pd.DataFrame({
+        "sura": np.repeat(suras + 1, counts),
+        "aya": np.repeat(aya_numbers + 1, counts),
+        "page": np.repeat(pages, counts),
+        "simple": list(chain.from_iterable(meta_data["simple"] for _, _, meta_data in ayas)),
+    })
+
+
+def compute_statistics(entries, tokens):
+    """The roots, suras, pages and words tables of the entries and tokens frames."""
+    word_counts = tokens["simple"].value_counts()
+    entries = entries.assign(corpus_count=entries["simple"].map(word_counts).fillna(0).astype(np.int64),
+                             aya_key=entries["sura"] * 1000 + entries["aya"])
+
+    root_words = entries.drop_duplicates(["root", "simple"])
+    roots = entries.groupby("root").agg(entries=("aya_key", "size"), ayas=("aya_key", "nunique"),
+                                        suras=("sura", "nunique"), words=("simple", "nunique"))
+    roots["corpus_occurrences"] = root_words.groupby("root")["corpus_count"].sum()
+
+    def per_unit(unit):
+        table = entries.groupby(unit).agg(entries=("root", "size"), roots=("root", "nunique"))
+        table["tokens"] = tokens.groupby(unit).size().reindex(table.index)
+        table["entries_per_1000_tokens"] = (table["entries"] * 1000 / table["tokens"]).round(2)
+        return table
+
+    words = entries.groupby(["root", "simple"]).agg(entries=("aya_key", "size"), corpus_occurrences=("corpus_count", "first"))
+    return {
+        "roots": roots.sort_values("entries", ascending=False).reset_index(),
+        "suras": per_unit("sura").reset_index(),
+        "pages": per_unit("page").reset_index(),
+        "words": words.sort_values(["root", "corpus_occurrences"], ascending=[True, False]).reset_index(),
+    }
+
+
+def compute_corpus_statistics(source_data, q_mapper):
+    """Statistics of canonicalized source data (see canonicalize_entered_words)."""
+    start = time.perf_counter()
+    statistics = compute_statistics(get_entries_frame(source_data), get_tokens_frame(q_mapper))
+    logging.info(f"Corpus statistics computed in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return statistics
+
+
+def export_statistics(statistics, csv_dir=STATS_CSV_DIR):
+    os.makedirs(csv_dir, exist_ok=True)
+    for name, table in statistics.items():
+        # the BOM lets spreadsheet applications detect the Arabic text as UTF-8
+        table.to_csv(os.path.join(csv_dir, f"{name}.csv"), index=False, encoding="utf-8-sig")
+    logging.info(f"Statistics {', '.join(statistics)} exported to {csv_dir}")
+
+
+if __name__ == "__main__":
+    from resources_loader import preload_resources
+    from utils import canonicalize_entered_words
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    source_data, q_mapper, _ = preload_resources(INPUT_DATA, with_fonts=False)
+    corpus_statistics = compute_corpus_statistics(canonicalize_entered_words(source_data, q_mapper, export=False), q_mapper)
+    export_statistics(corpus_statistics, *sys.argv[1:2])
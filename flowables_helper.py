@@ -0,0 +1,170 @@
+import logging
+from collections import Counter
+
+from reportlab.lib.colors import toColor
+from reportlab.lib.rl_accel import fp_str
+from reportlab.pdfgen.textobject import PDFTextObject
+from reportlab.platypus import Paragraph, Table
+
+from utils import ar
+
+
+class ArParagraph(Paragraph):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def breakLines(self, width):
+        broken = super().breakLines(width)
+        ara_lines = []
+        for line_data in broken.lines:
+            if isinstance(line_data, tuple):
+                rem, lines = line_data
+                ara_lines.append((rem, [line[::-1] for line in lines]))
+            else:
+                for word in line_data.words:
+                    word.text = word.text[::-1]
+                line_data.words = line_data.words[::-1]
+                ara_lines.append(line_data)
+
+        broken.lines = ara_lines
+
+        return broken
+
+
+class AppendixTable(Table):
+    """Table of the statistics appendix, not counted as a root table by the document."""
+
+
+class ParagraphLayoutCache:
+    """
+    Line breaks of the paragraphs of one build, keyed by (style, text, width): an aya repeated under many roots, and
+    its translations, are broken into lines once. The cache is shared by the story copies of both layout passes.
+    """
+
+    def __init__(self):
+        self.layouts = {}
+        self.occurrences = Counter()  # (style, text) -> paragraphs created
+        self.wraps = 0
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def register(self, paragraph):
+        self.occurrences[paragraph.style.name, paragraph.layout_text] += 1
+
+    def wrap(self, paragraph, availWidth, availHeight):
+        self.wraps += 1
+        key = (paragraph.style.name, paragraph.layout_text, availWidth)
+        if key not in self.layouts:
+            # the wrap of the paragraph class itself (ArParagraph or Paragraph)
+            size = super(CachedLayoutMixin, paragraph).wrap(availWidth, availHeight)
+            self.layouts[key] = size, getattr(paragraph, "blPara", None), getattr(paragraph, "_wrapWidths", None)
+        (paragraph.width, paragraph.height), paragraph.blPara, paragraph._wrapWidths = self.layouts[key]
+        return paragraph.width, paragraph.height
+
+    def log_stats(self):
+        if not self.wraps:
+            return
+        paragraphs = sum(self.occurrences.values())
+        logging.info(f"Paragraph layouts: {paragraphs} paragraphs of {len(self.occurrences)} distinct texts "
+                     f"(dedup ratio {paragraphs / max(1, len(self.occurrences)):.2f}), "
+                     f"{self.wraps} wraps computed {len(self.layouts)} times")
+
+
+class CachedLayoutMixin:
+    """
+    Paragraph wrapped through a ParagraphLayoutCache, paragraphs of the same text and style share their lines.
+    The parts made by Paragraph.split (from the frags of their lines, without a text or a cache) are wrapped as usual.
+    """
+
+    def __init__(self, text, style, layout_cache=None, **kwargs):
+        super().__init__(text, style, **kwargs)
+        self.layout_text = text
+        self.layout_cache = layout_cache
+        if layout_cache is not None:
+            layout_cache.register(self)
+
+    def wrap(self, availWidth, availHeight):
+        if self.layout_cache is None:
+            return super().wrap(availWidth, availHeight)
+        return self.layout_cache.wrap(self, availWidth, availHeight)
+
+
+class CachedParagraph(CachedLayoutMixin, Paragraph):
+    pass
+
+
+class AyaTextObject(PDFTextObject):
+    """
+    Draws the reversed lines of an AyaParagraph symbol by symbol in reading order, each one moved to its place from the
+    right end of the line, so the extracted text (QURAN_TEXT_LAYER) follows the reading order whatever the bidi support
+    of the viewer. The highlighted symbol, if any, is filled with highlight_color.
+    """
+
+    def __init__(self, canvas, x, y, highlight_idx=None, highlight_color=None, text_color=None):
+        super().__init__(canvas, x, y)
+        self.highlight_idx = highlight_idx
+        self.highlight_color = highlight_color
+        self.text_color = text_color
+        self.line_start = 0  # index of the first symbol of the current line in the aya
+
+    def _textOut(self, text, TStar=0):
+        char_space = getattr(self, "_charSpace", 0)
+        widths = [self._canvas.stringWidth(symbol, self._fontname, self._fontsize) + char_space for symbol in reversed(text)]
+        # Td moves relative to the previous symbol, the last one drawn is back at the start of the line
+        x, previous_x = sum(widths), 0
+        for idx, (symbol, width) in enumerate(zip(reversed(text), widths), start=self.line_start):
+            x -= width
+            self._code.append("%s 0 Td" % fp_str(x - previous_x))
+            previous_x = x
+            if idx == self.highlight_idx:
+                self.setFillColor(self.highlight_color)
+                super()._textOut(symbol)
+                self.setFillColor(self.text_color)
+            else:
+                super()._textOut(symbol)
+        if TStar:
+            self._code.append("T*")
+        self.line_start += len(text)
+
+
+class AyaParagraph(CachedLayoutMixin, ArParagraph):
+    """
+    Font symbols of an aya with one of them highlighted. The lines are broken without the highlight, which doesn't
+    change any width, so every occurrence of the aya shares them and the color is only applied when drawing.
+    The symbol sequences have no spaces, every drawn line is a reversed slice of the aya.
+    """
+
+    def __init__(self, symbols, style, layout_cache=None, highlight_idx=None, highlight_color="red", **kwargs):
+        super().__init__(symbols, style, layout_cache, **kwargs)
+        self.highlight_idx = highlight_idx
+        self.highlight_color = toColor(highlight_color)
+
+    def split(self, availWidth, availHeight):
+        parts = super().split(availWidth, availHeight)
+        if len(parts) < 2:
+            return parts
+        # Paragraph.split makes the parts from the drawn (reversed) lines, they are made from the symbols instead, the
+        # first part holding the symbols of its lines, with the cache and the highlight moved to the part holding it
+        split_idx = sum(len("".join(words)) for _, words in self.blPara.lines[:len(parts[0].blPara.lines)])
+        return [self.get_part(0, split_idx), self.get_part(split_idx, len(self.layout_text))]
+
+    def get_part(self, start, end):
+        highlight_idx = self.highlight_idx
+        if highlight_idx is not None and start <= highlight_idx < end:
+            highlight_idx -= start
+        else:
+            highlight_idx = None
+        return self.__class__(self.layout_text[start:end], self.style, self.layout_cache, highlight_idx, self.highlight_color)
+
+    def beginText(self, x, y):
+        return AyaTextObject(self.canv, x, y, self.highlight_idx, self.highlight_color, self.style.textColor)
+
+
+def get_sura_name_cells(entry, eng_style, ar_style, is_arabic):
+    if is_arabic:
+        return Paragraph(ar(entry["sura_name_ar"]), ar_style)
+    return [
+        Paragraph(ar(entry["sura_name_en"]), eng_style),
+        Paragraph(ar(entry["sura_name_ar"]), ar_style),
+    ]
@@ -0,0 +1,140 @@
+"""
+Batch version of generate_sample.py: renders every aya (or a range of suras) as a static site, one HTML file per
+mushaf page, each page referencing a subset of its QPC font holding only the glyphs used on that page.
+
+    python generate_site.py [first_sura] [last_sura]
+"""
+import html
+import json
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from fontTools import subset
+from fontTools.ttLib import TTFont
+
+TRIPLETS_JSON = "quran_text_to_font.json"
+FONT_ROOT = "../resources/fonts"
+SITE_ROOT = "site"
+
+PAGE_STYLE = """
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            direction: rtl;
+            margin-bottom: 20px;
+        }
+        td {
+            text-align: center;
+            padding: 10px;
+            border: 1px solid #ddd;
+            cursor: pointer;
+        }
+        .font-symbol {
+            font-family: "page-font";
+            font-size: 32px;
+        }
+        .uthmani-token {
+            font-size: 24px;
+        }
+        td:hover {
+            background-color: gray;
+        }
+"""
+
+
+def load_pages(first_sura=1, last_sura=114):
+    """Indexes the triplets by mushaf page in a single pass: {font_id: [aya entries in mushaf order]}."""
+    with open(TRIPLETS_JSON, encoding="utf-8") as f:
+        json_data = json.load(f)
+    pages = defaultdict(list)
+    for entry in json_data:
+        if first_sura <= entry["sura_no"] <= last_sura:
+            pages[entry["font_id"]].append(entry)
+    return pages
+
+
+def subset_page_font(font_id, symbols):
+    """Writes fonts/<font_id>.woff with only the glyphs of the given symbols, returns its size in bytes."""
+    options = subset.Options()
+    options.flavor = "woff"
+    options.layout_features = ["*"]
+    options.notdef_outline = True
+    options.drop_tables += ["FFTM"]  # FontForge timestamps, not needed by browsers
+    font = TTFont(os.path.join(FONT_ROOT, f"{font_id}.ttf"))
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=[ord(symbol) for symbol in symbols])
+    subsetter.subset(font)
+    font_path = os.path.join(SITE_ROOT, "fonts", f"{font_id}.woff")
+    subset.save_font(font, font_path, options)
+    return os.path.getsize(font_path)
+
+
+def generate_aya_table(entry):
+    """Same rows as generate_html_with_hover: simple tokens, Uthmani tokens, font symbols, rendered font symbols."""
+    rows = [
+        [f'<td class="uthmani-token">{html.escape(token)}</td>' for token in entry["simple"]],
+        [f'<td class="uthmani-token">{html.escape(token)}</td>' for token in entry["uthmani_tokens"]],
+        [f'<td>{symbol}</td>' for symbol in entry["font_symbols"]],
+        [f'<td class="font-symbol">{symbol}</td>' for symbol in entry["font_symbols"]],
+    ]
+    return (f'<h2 id="{entry["sura_no"]}-{entry["aya_no"]}">Sura {entry["sura_no"]}, Aya {entry["aya_no"]}</h2>\n'
+            '<table>\n' + "".join(f"<tr>{''.join(cells)}</tr>\n" for cells in rows) + '</table>\n')
+
+
+def generate_page(font_id, entries, previous_page=None, next_page=None):
+    """Writes <font_id>.html with all the ayas of the page and its font subset, returns the font subset size."""
+    font_size = subset_page_font(font_id, {symbol for entry in entries for symbol in entry["font_symbols"]})
+    links = " ".join(f'<a href="{page}.html">{label}</a>' for page, label in
+                     [(previous_page, "Previous page"), ("index", "Index"), (next_page, "Next page")] if page)
+    html_content = f"""<!DOCTYPE html>
+<html lang="ar" dir="rtl">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Page {font_id[1:]}</title>
+    <style>
+        @font-face {{
+            font-family: "page-font";
+            src: url("fonts/{font_id}.woff") format("woff");
+        }}{PAGE_STYLE}    </style>
+</head>
+<body>
+<h1>Page {font_id[1:]}</h1>
+<nav>{links}</nav>
+{"".join(generate_aya_table(entry) for entry in entries)}</body>
+</html>
+"""
+    with open(os.path.join(SITE_ROOT, f"{font_id}.html"), "w", encoding="utf-8") as f:
+        f.write(html_content)
+    return font_size
+
+
+def generate_index(pages):
+    items = "".join(f'<li><a href="{font_id}.html">Page {font_id[1:]}</a>: '
+                    f'{entries[0]["sura_no"]}:{entries[0]["aya_no"]} - {entries[-1]["sura_no"]}:{entries[-1]["aya_no"]}</li>\n'
+                    for font_id, entries in pages.items())
+    with open(os.path.join(SITE_ROOT, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f'<!DOCTYPE html>\n<html lang="ar" dir="rtl">\n<head><meta charset="UTF-8"><title>Quran fonts</title></head>\n'
+                f'<body>\n<h1>Quran fonts</h1>\n<ul>\n{items}</ul>\n</body>\n</html>\n')
+
+
+def generate_site(first_sura=1, last_sura=114):
+    pages = load_pages(first_sura, last_sura)
+    pages = dict(sorted(pages.items(), key=lambda page: int(page[0][1:])))
+    os.makedirs(os.path.join(SITE_ROOT, "fonts"), exist_ok=True)
+
+    page_ids = list(pages)
+    with ProcessPoolExecutor() as executor:
+        font_sizes = list(executor.map(generate_page, page_ids, pages.values(),
+                                       [None] + page_ids[:-1], page_ids[1:] + [None]))
+    generate_index(pages)
+
+    full_fonts_size = sum(os.path.getsize(os.path.join(FONT_ROOT, f"{font_id}.ttf")) for font_id in page_ids)
+    print(f"{sum(len(entries) for entries in pages.values())} ayas on {len(pages)} pages generated in {SITE_ROOT}/, "
+          f"fonts: {sum(font_sizes) / 1024:.0f} KB of subsets instead of {full_fonts_size / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    generate_site(*[int(arg) for arg in sys.argv[1:3]])
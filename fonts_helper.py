@@ -0,0 +1,107 @@
+import glob
+import os
+import re
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, SUBSETN
+
+from config import FONT_ROOT
+
+
+def make_glyph_text_cmap(font_name, subset, glyph_text):
+    """Creates a ToUnicode CMap mapping each subset code to the text its glyph renders (same layout as reportlab's)."""
+    cmap = [
+        "/CIDInit /ProcSet findresource begin",
+        "12 dict begin",
+        "begincmap",
+        "/CIDSystemInfo",
+        "<< /Registry (%s)" % font_name,
+        "/Ordering (%s)" % font_name,
+        "/Supplement 0",
+        ">> def",
+        "/CMapName /%s def" % font_name,
+        "/CMapType 2 def",
+        "1 begincodespacerange",
+        "<00> <%02X>" % (len(subset) - 1),
+        "endcodespacerange",
+    ]
+    # a bfchar block can hold at most 100 mappings
+    for block_start in range(0, len(subset), 100):
+        block = subset[block_start:block_start + 100]
+        cmap.append("%d beginbfchar" % len(block))
+        for code, codepoint in enumerate(block, start=block_start):
+            text = chr(codepoint)
+            if text in glyph_text:
+                # the token in reading order (the symbols of the ayas are drawn in reading order, see AyaTextObject),
+                # the space keeps the copied words apart
+                text = glyph_text[text] + " "
+            cmap.append("<%02X> <%s>" % (code, text.encode("utf-16-be").hex().upper()))
+        cmap.append("endbfchar")
+    cmap += [
+        "endcmap",
+        "CMapName currentdict /CMap defineresource pop",
+        "end",
+        "end"
+    ]
+    return "\n".join(cmap)
+
+
+class QuranTTFont(TTFont):
+    """A QPC page font whose ToUnicode CMaps map glyphs to their Uthmani tokens, so copy/paste and search give real text."""
+
+    def __init__(self, name, filename, glyph_text=None, **kwargs):
+        super().__init__(name, filename, **kwargs)
+        self.glyph_text = glyph_text or {}
+
+    def addObjects(self, doc):
+        if not self.glyph_text:
+            return super().addObjects(doc)
+        try:
+            subsets = list(self.state[doc].subsets)
+        except KeyError:
+            subsets = []
+        super().addObjects(doc)
+        for n, subset in enumerate(subsets):
+            base_font_name = (b''.join((SUBSETN(n), b'+', self.face.name, self.face.subfontNameX))).decode('pdfdoc')
+            cmap_stream = doc.idToObject['toUnicodeCMap:' + base_font_name]
+            cmap_stream.content = make_glyph_text_cmap(base_font_name, subset, self.glyph_text)
+
+
+def load_fonts(page_font_ids=None):
+    """
+    Parses every font file, QPC page fonts as QuranTTFont, returns [(font_name, font)] ready to be registered.
+    When page_font_ids is given, only those QPC page fonts are parsed (previews of a few roots).
+    """
+    fonts = []
+    ttf_files = sorted(glob.glob(os.path.join(FONT_ROOT, "*.ttf")))
+    for ttf_file in ttf_files:
+        font_name = os.path.splitext(os.path.basename(ttf_file))[0]
+        is_page_font = re.fullmatch(r"p[0-9]+", font_name)
+        if is_page_font and page_font_ids is not None and font_name not in page_font_ids:
+            continue
+        font_class = QuranTTFont if is_page_font else TTFont
+        fonts.append((font_name, font_class(font_name, ttf_file)))
+
+    specific_fonts = [
+        ("Nabi", "Nabi Regular.ttf"),
+        ("me_quran", "me_quran Regular.ttf"),
+        ("Arial", "Arial-Unicode-Bold.ttf"),
+    ]
+    for font_name, font_file in specific_fonts:
+        fonts.append((font_name, TTFont(font_name, os.path.join(FONT_ROOT, font_file))))
+
+    noto_fonts = ["Bold", "Medium", "Regular", "SemiBold", "VariableFont_wght"]
+    for noto_font in noto_fonts:
+        font_name = f"NotoNaskhArabic-{noto_font}"
+        fonts.append((font_name, TTFont(font_name, os.path.join(FONT_ROOT, f"{font_name}.ttf"))))
+    return fonts
+
+
+def register_fonts(glyph_text_lookup=None, fonts=None):
+    glyph_text_lookup = glyph_text_lookup or {}
+    if fonts is None:
+        fonts = load_fonts()
+    for font_name, font in fonts:
+        if isinstance(font, QuranTTFont):
+            font.glyph_text = glyph_text_lookup.get(font_name, {})
+        pdfmetrics.registerFont(font)
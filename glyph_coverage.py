@@ -0,0 +1,118 @@
+# glyph_coverage.py
+"""
+Upfront check that every QPC page font (pNNN.ttf) has a glyph for each symbol listed for its page in MUSHAF_RES,
+so a missing glyph fails the build before the long rendering instead of showing up as a blank in the PDF:
+
+    python glyph_coverage.py [report.json]
+
+The cmaps are read with fontTools in worker processes and cached by font hash (GLYPH_COVERAGE_CACHE), only new or
+changed fonts are parsed again. Every missing font and symbol is listed in one JSON report, the exit status is 1 when
+any is found. Builds run the check from preload_resources when CHECK_GLYPH_COVERAGE is set.
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from config import FONT_ROOT, GLYPH_COVERAGE_CACHE, GLYPH_COVERAGE_REPORT
+from quran_data import load_ayas_fonts_per_page
+
+
+def get_font_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha1").hexdigest()
+
+
+def read_font_codepoints(path):
+    """Code points of the font cmap, runs in the worker processes."""
+    from fontTools.ttLib import TTFont
+
+    with TTFont(path, lazy=True) as font:
+        return sorted(font.getBestCmap())
+
+
+def load_codepoints_cache(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_codepoints_cache(path, codepoints_per_digest):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with open(fd, "w", encoding="utf-8") as f:
+        json.dump(codepoints_per_digest, f)
+    os.replace(tmp_path, path)
+
+
+def get_page_fonts_codepoints(font_paths, cache_path=GLYPH_COVERAGE_CACHE, workers=None):
+    """Code points of every font, {font_id: set}, read from the cache when the font hash is known."""
+    cache = load_codepoints_cache(cache_path)
+    digests = {font_id: get_font_digest(path) for font_id, path in font_paths.items()}
+    missed = sorted({digest: font_id for font_id, digest in digests.items() if digest not in cache}.items())
+    if missed:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            codepoints = executor.map(read_font_codepoints, [font_paths[font_id] for _, font_id in missed], chunksize=16)
+            cache.update((digest, font_codepoints) for (digest, _), font_codepoints in zip(missed, codepoints))
+        if cache_path:
+            save_codepoints_cache(cache_path, cache)
+    logging.info(f"Glyph coverage: {len(font_paths) - len(missed)}/{len(font_paths)} font cmaps read from the cache")
+    return {font_id: set(cache[digest]) for font_id, digest in digests.items()}
+
+
+def check_glyph_coverage(font_root=FONT_ROOT, cache_path=GLYPH_COVERAGE_CACHE, workers=None):
+    """Returns the coverage report of the page fonts over the symbols of MUSHAF_RES."""
+    start = time.time()
+    symbols_per_font = defaultdict(list)  # font_id -> [(MUSHAF_RES line, symbols)]
+    for line_no, aya_font in enumerate(load_ayas_fonts_per_page(), start=1):
+        symbols_per_font[aya_font["font_id"]].append((line_no, aya_font["symbols"]))
+
+    font_paths = {font_id: os.path.join(font_root, f"{font_id}.ttf") for font_id in symbols_per_font}
+    missing_fonts = sorted((font_id for font_id, path in font_paths.items() if not os.path.exists(path)),
+                           key=lambda font_id: int(font_id[1:]))
+    codepoints = get_page_fonts_codepoints({font_id: path for font_id, path in font_paths.items() if font_id not in missing_fonts},
+                                           cache_path, workers)
+
+    missing_symbols = []
+    checked_symbols = 0
+    for font_id, lines in symbols_per_font.items():
+        if font_id in missing_fonts:
+            continue
+        for line_no, symbols in lines:
+            checked_symbols += len(symbols)
+            missing = [f"U+{ord(symbol):04X}" for symbol in dict.fromkeys(symbols) if ord(symbol) not in codepoints[font_id]]
+            if missing:
+                missing_symbols.append({"font_id": font_id, "line": line_no, "symbols": missing})
+
+    return {"fonts": len(font_paths), "checked_symbols": checked_symbols,
+            "missing_fonts": missing_fonts, "missing_symbols": missing_symbols,
+            "elapsed_seconds": round(time.time() - start, 3)}
+
+
+def verify_glyph_coverage(report_path=GLYPH_COVERAGE_REPORT, font_root=FONT_ROOT, cache_path=GLYPH_COVERAGE_CACHE, workers=None):
+    """Runs the check and saves its report, raises a ValueError when a font or a glyph is missing."""
+    report = check_glyph_coverage(font_root, cache_path, workers)
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    logging.info(f"Glyph coverage of {report['fonts']} page fonts over {report['checked_symbols']} symbols checked "
+                 f"in {report['elapsed_seconds']}s, report saved to {report_path}")
+    if report["missing_fonts"] or report["missing_symbols"]:
+        raise ValueError(f"{len(report['missing_fonts'])} page fonts missing and "
+                         f"{sum(len(line['symbols']) for line in report['missing_symbols'])} symbols without a glyph, "
+                         f"see {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    try:
+        verify_glyph_coverage(*sys.argv[1:2])
+    except ValueError as e:
+        logging.error(e)
+        sys.exit(1)
@@ -1,19 +1,32 @@
 from reportlab.platypus import Table
 
-from config import IS_ARABIC, HALF_HEADER, SINGLE_COLUMN, HEADER_TABLE_RATIOS_DOUBLE, HEADER_TABLE_RATIOS_SINGLE
-from styles_helpers import generate_root_table_style
+from config import HEADER_TABLE_RATIOS_DOUBLE, HEADER_TABLE_RATIOS_SINGLE, REUSE_FORM_XOBJECTS
+from styles_helpers import generate_root_table_style, generate_columns_header_style
 from utils import ar, get_cols_from_ratios
+from xobjects_helper import FormFlowable, get_form_name
 
 
-def generate_columns_header():
-    if SINGLE_COLUMN:
-        return [ar(text) if IS_ARABIC else text for text in HALF_HEADER]
+def generate_columns_header(options):
+    if options.one_entry_per_row:
+        return [ar(text) if options.is_arabic else text for text in options.half_header]
     else:
-        return ([ar(text) if IS_ARABIC else text for text in HALF_HEADER + ["", ""]] * 2)[:-2]
+        return ([ar(text) if options.is_arabic else text for text in options.half_header + ["", ""]] * 2)[:-2]
 
 
-def generate_root_header(root, font, page_width):
-    if IS_ARABIC:
+def generate_columns_header_row(col_widths, options):
+    columns_header = generate_columns_header(options)
+    if not REUSE_FORM_XOBJECTS:
+        return columns_header
+
+    table = Table([columns_header], colWidths=col_widths)
+    table.setStyle(generate_columns_header_style(options))
+    # a single spanned cell holding the whole header, see generate_style_per_entry
+    form_name = get_form_name("columns_header", f"{col_widths}")
+    return [FormFlowable(table, form_name)] + [""] * (len(columns_header) - 1)
+
+
+def generate_root_header(root, font, table_width, options):
+    if options.is_arabic:
         header_data = [
             "",
             ar(root),
@@ -26,10 +39,12 @@ def generate_root_header(root, font, page_width):
             "",
         ]
     header_row_cols = get_cols_from_ratios(
-        HEADER_TABLE_RATIOS_SINGLE if SINGLE_COLUMN else HEADER_TABLE_RATIOS_DOUBLE,
-        page_width * .9)
+        HEADER_TABLE_RATIOS_SINGLE if options.one_entry_per_row else HEADER_TABLE_RATIOS_DOUBLE,
+        table_width)
 
     table = Table([header_data], colWidths=header_row_cols)
 
-    table.setStyle(generate_root_table_style(font))
+    table.setStyle(generate_root_table_style(font, options))
+    if REUSE_FORM_XOBJECTS:
+        return FormFlowable(table, get_form_name("root_header", f"{root}_{font}_{header_row_cols}"))
     return table
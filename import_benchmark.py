@@ -0,0 +1,64 @@
+"""
+Import-time benchmark, based on `python -X importtime`.
+
+Each module is imported in a fresh interpreter and its cumulative import time is compared against a budget, the
+modules rendering nothing must not import ReportLab at all. The script exits with a non-zero status when a module
+goes over budget or imports ReportLab:
+
+    python import_benchmark.py
+"""
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+# cumulative import time budgets in milliseconds
+IMPORT_BUDGETS_MS = {
+    "config": 30,  # no reportlab (the color options are in styles_helpers)
+    "quran_data": 300,
+    "utils": 250,  # no pandas/fuzzywuzzy/arabic_reshaper/bidi/reportlab at import
+    "main": 100,  # the manifest check only, no reportlab/tqdm/rendering stages (reportlab.lib.colors alone is ~100ms)
+    "pdf_generation": 600,  # the full rendering stage
+    "input_validation": 250,  # nothing rendered, no reportlab (config and utils don't import it)
+}
+# modules importing no reportlab module, whatever their budget
+NO_REPORTLAB_MODULES = ["config", "utils", "main", "input_validation"]
+
+
+def measure_import_time(module):
+    """
+    Returns the cumulative import time of module in milliseconds, as reported by -X importtime, and the names of the
+    modules it imported.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        imported.append(name.strip())
+        # top level entries are not indented
+        if name.rstrip() == f" {module}":
+            return int(cumulative) / 1000, imported
+    raise ValueError(f"{module} not found in the -X importtime report")
+
+
+def run_benchmark():
+    over_budget = []
+    print(f"{'module':<16}{'median ms':>12}{'budget ms':>12}{'reportlab':>11}")
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        measures = [measure_import_time(module) for _ in range(RUNS)]
+        median = statistics.median(import_time for import_time, _ in measures)
+        reportlab_imported = any(name.split(".")[0] == "reportlab" for name in measures[0][1])
+        print(f"{module:<16}{median:>12.1f}{budget:>12}{'yes' if reportlab_imported else 'no':>11}")
+        if median > budget or (reportlab_imported and module in NO_REPORTLAB_MODULES):
+            over_budget.append(module)
+    return over_budget
+
+
+if __name__ == "__main__":
+    over_budget_modules = run_benchmark()
+    if over_budget_modules:
+        print("Over budget:", ", ".join(over_budget_modules))
+        sys.exit(1)
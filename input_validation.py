@@ -0,0 +1,166 @@
+# input_validation.py
+"""
+Validation-only mode for the input spreadsheet (or a database built by corpus_db.py).
+
+Every row is checked and all the problems are reported in one pass as a JSON report, nothing is rendered and no
+font is registered, so it finishes in seconds:
+
+    python input_validation.py [data.xlsx|quran_corpus.db] [report.json]
+
+Checks: missing fields, sura/aya ranges, whether the word can be found in its aya and the quality of the match,
+duplicate entries of a root, and roots with an odd number of entries (padded with an empty cell) in double column
+mode. The fuzzy matching runs in worker processes. Rows are numbered as in the spreadsheet, the header being row 1.
+The exit status is 1 when any error is found.
+"""
+import json
+import logging
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from config import BINARY_CORPUS, INPUT_DATA, ONE_ENTRY_PER_ROW, VALIDATION_REPORT
+from utils import GOOD_MATCH_SCORE, MIN_MATCH_SCORE, fuzzy_match_token
+
+# set in each worker process by init_worker, so the corpus is sent once per worker instead of once per chunk
+worker_q_mapper = None
+
+
+def init_worker(q_mapper):
+    global worker_q_mapper
+    worker_q_mapper = q_mapper
+
+
+def load_validation_corpus():
+    """The binary corpus when it has been built (workers map the same file), else the parsed mapping as a plain dict."""
+    if os.path.exists(BINARY_CORPUS):
+        from binary_corpus import BinaryCorpus
+        return BinaryCorpus(BINARY_CORPUS)
+    from quran_data import create_font_text_mapping
+    return dict(create_font_text_mapping())
+
+
+def load_validation_records(path):
+    from corpus_db import is_corpus_db, load_source_records_from_db
+    if is_corpus_db(path):
+        return load_source_records_from_db(path)
+    from utils import read_source_records
+    return read_source_records(path)
+
+
+def as_int(value):
+    """Returns value as an int when it is a whole number (pandas reads int columns with empty cells as floats)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value) and value == int(value):
+        return int(value)
+    return None
+
+
+def as_json_value(value):
+    """Empty spreadsheet cells are read as NaN, which is not valid JSON."""
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def is_text(value):
+    return isinstance(value, str) and value.strip() != ""
+
+
+def match_rows(rows):
+    """Fuzzy matches (row, sura, aya, word) rows, sura/aya being 0-based, returns (row, token index, score, token)."""
+    matches = []
+    for row, sura, aya, word in rows:
+        meta_data = worker_q_mapper[sura, aya]
+        token_idx, score = fuzzy_match_token(meta_data, word)
+        matches.append((row, token_idx, score, meta_data["simple"][token_idx]))
+    return matches
+
+
+def validate_records(records, q_mapper, ayas_per_sura, workers=None):
+    """Returns the list of problems of the records, as dicts with the row, check, severity and a message."""
+    problems = []
+
+    def report(row, record, check, severity, message):
+        problems.append({"row": row, "check": check, "severity": severity,
+                         **{field: as_json_value(record.get(field)) for field in ["root", "sura_no", "aya_no", "word"]},
+                         "message": message})
+
+    # field and range checks, the rows passing them are matched against their aya
+    rows_to_match = []
+    for row, record in enumerate(records, start=2):
+        sura, aya = as_int(record.get("sura_no")), as_int(record.get("aya_no"))
+        if not is_text(record.get("root")):
+            report(row, record, "missing_root", "error", "the root is empty")
+        if not is_text(record.get("word")):
+            report(row, record, "missing_word", "error", "the word is empty")
+        if sura is None or not 1 <= sura <= len(ayas_per_sura):
+            report(row, record, "sura_range", "error", f"sura_no must be a number from 1 to {len(ayas_per_sura)}")
+        elif aya is None or not 1 <= aya <= ayas_per_sura[sura - 1]:
+            report(row, record, "aya_range", "error", f"aya_no must be a number from 1 to {ayas_per_sura[sura - 1]} for sura {sura}")
+        elif is_text(record.get("word")):
+            rows_to_match.append((row, sura - 1, aya - 1, record["word"]))
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = math.ceil(len(rows_to_match) / (workers * 4)) or 1
+    chunks = [rows_to_match[i:i + chunk_size] for i in range(0, len(rows_to_match), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(q_mapper,)) as executor:
+        matches = [match for chunk_matches in executor.map(match_rows, chunks) for match in chunk_matches]
+
+    tokens = {}
+    for row, token_idx, score, token in matches:
+        record = records[row - 2]
+        if score <= MIN_MATCH_SCORE:
+            report(row, record, "word_not_found", "error", f"closest token of the aya is {token} (score {score})")
+        else:
+            tokens[row] = token_idx
+            if score < GOOD_MATCH_SCORE:
+                report(row, record, "weak_match", "warning", f"matched to {token} with score {score}")
+
+    # entries of the same root pointing at the same token (or with the same word when it wasn't found)
+    seen = {}
+    for row, record in enumerate(records, start=2):
+        key = (record.get("root"), record.get("sura_no"), record.get("aya_no"), tokens.get(row, record.get("word")))
+        if key in seen:
+            report(row, record, "duplicate_entry", "warning", f"same root and token as row {seen[key]}")
+        else:
+            seen[key] = row
+
+    if not ONE_ENTRY_PER_ROW:
+        root_rows = defaultdict(list)
+        for row, record in enumerate(records, start=2):
+            root_rows[record.get("root")].append(row)
+        for root, rows in root_rows.items():
+            if len(rows) % 2 == 1:
+                report(rows[-1], records[rows[-1] - 2], "odd_root_count", "info",
+                       f"{len(rows)} entries, the last row of the root is padded with an empty cell in double column mode")
+
+    return sorted(problems, key=lambda problem: problem["row"])
+
+
+def validate_input(source_path=INPUT_DATA, report_path=VALIDATION_REPORT, workers=None):
+    """Validates every row of the source, writes the JSON report and returns it."""
+    from quran_data import load_quran_meta
+
+    start = time.time()
+    records = load_validation_records(source_path)
+    ayas_per_sura = [int(sura["@ayas"]) for sura in load_quran_meta()["quran"]["suras"]["sura"]]
+    problems = validate_records(records, load_validation_corpus(), ayas_per_sura, workers)
+
+    counts = defaultdict(int)
+    for problem in problems:
+        counts[problem["severity"]] += 1
+    report = {"source": source_path, "rows": len(records),
+              "errors": counts["error"], "warnings": counts["warning"], "infos": counts["info"],
+              "elapsed_seconds": round(time.time() - start, 3), "problems": problems}
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    logging.info(f"{source_path}: {len(records)} rows, {report['errors']} errors, {report['warnings']} warnings "
+                 f"in {report['elapsed_seconds']}s, report saved to {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    validation_report = validate_input(*sys.argv[1:3])
+    sys.exit(1 if validation_report["errors"] else 0)
@@ -0,0 +1,105 @@
+# layout_profiler.py
+"""
+Optional instrumentation of the ReportLab hot path (PROFILE_LAYOUT): counts and times every wrap, split and drawOn
+call per flowable class and per root, including the nested calls made by the tables for their cells.
+
+Only the flowables of the profiled document are instrumented (their methods are wrapped on the instances, the classes
+are left alone), so the other builds running in the process are not slowed down nor counted.
+
+Times are cumulative (the call and everything it calls) and self (excluding the profiled calls nested in it), the
+self times add up to the total layout time so they are the ones attributed to the roots.
+"""
+import logging
+import time
+import types
+from collections import defaultdict
+
+from reportlab.platypus import Flowable, Table
+
+from bookmarks_helper import is_root_subtable
+from xobjects_helper import FormFlowable
+
+# wrapped on every flowable instance, the wraps served by the paragraph layout cache are counted with its misses
+PROFILED_METHODS = ["wrap", "split", "drawOn"]
+
+
+def get_flowable_label(flowable):
+    if is_root_subtable(flowable):
+        return "Table (root subtable)"
+    if isinstance(flowable, Table) and flowable.repeatRows == 2:
+        return "Table (root)"
+    return type(flowable).__name__
+
+
+def get_nested_flowables(flowable):
+    """The flowables of the table cells (a cell holds a flowable, a list of them or a string) and of the forms."""
+    if isinstance(flowable, Table):
+        for row in flowable._cellvalues:
+            for cell in row:
+                yield from (cell if isinstance(cell, (list, tuple)) else [cell])
+    elif isinstance(flowable, FormFlowable):
+        yield flowable.flowable
+
+
+class LayoutProfiler:
+    """Instruments the flowables of a document story (instrument) while it is built, see log_summary for the results."""
+
+    def __init__(self):
+        self.document = None  # the QuranDocument being built, for its current root
+        self.method_stats = defaultdict(lambda: [0, 0.0, 0.0])  # (method, label) -> [calls, cumulative, self]
+        self.root_stats = defaultdict(lambda: [0, 0.0])  # root -> [calls, self time]
+        self._stack = []  # [flowable, method, time spent in nested profiled calls]
+
+    def instrument(self, flowables):
+        """Wraps the profiled methods of the flowables, of their nested flowables and of the parts they are split into."""
+        stack = list(flowables)
+        while stack:
+            flowable = stack.pop()
+            if not isinstance(flowable, Flowable) or flowable.__dict__.get("_layout_profiler") is self:
+                continue
+            flowable._layout_profiler = self
+            for method_name in PROFILED_METHODS:
+                setattr(flowable, method_name, types.MethodType(self._profile(method_name), flowable))
+            stack.extend(get_nested_flowables(flowable))
+
+    def _profile(self, method_name):
+        profiler = self
+
+        def profiled(flowable, *args, **kwargs):
+            # the method of the class, the wrapper shadows it on the instance
+            original = getattr(type(flowable), method_name)
+            frame = [flowable, method_name, 0.0]
+            profiler._stack.append(frame)
+            start = time.perf_counter()
+            try:
+                result = original(flowable, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                profiler._stack.pop()
+                if profiler._stack:
+                    profiler._stack[-1][2] += elapsed
+                profiler._record(flowable, method_name, elapsed, elapsed - frame[2])
+            if method_name == "split":
+                profiler.instrument(result)
+            return result
+
+        return profiled
+
+    def _record(self, flowable, method_name, cumulative, self_time):
+        stats = self.method_stats[method_name, get_flowable_label(flowable)]
+        stats[0] += 1
+        stats[1] += cumulative
+        stats[2] += self_time
+        root_stats = self.root_stats[self.document.current_root if self.document else None]
+        root_stats[0] += 1
+        root_stats[1] += self_time
+
+    def log_summary(self, top_roots=20):
+        """Logs the calls per method and flowable class sorted by cumulative time, then the slowest roots."""
+        lines = [f"{'method':<8}{'flowable':<24}{'calls':>10}{'cumulative s':>14}{'self s':>10}"]
+        for (method_name, label), (calls, cumulative, self_time) in sorted(self.method_stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{method_name:<8}{label:<24}{calls:>10}{cumulative:>14.3f}{self_time:>10.3f}")
+        lines.append(f"{'root':<32}{'calls':>10}{'self s':>10}")
+        for root, (calls, self_time) in sorted(self.root_stats.items(), key=lambda item: -item[1][1])[:top_roots]:
+            lines.append(f"{str(root):<32}{calls:>10}{self_time:>10.3f}")
+        logging.info("Layout profile:\n" + "\n".join(lines))
@@ -0,0 +1,69 @@
+"""
+Load test of the lookup service: concurrent keep-alive clients request a mix of roots, ayas and pages for a fixed
+duration, then the requests/sec and the latency percentiles are printed.
+
+    python lookup_load_test.py [clients] [seconds] [port]
+"""
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from urllib.parse import quote
+
+from config import LOOKUP_SERVICE_HOST, LOOKUP_SERVICE_PORT
+
+
+async def request(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {LOOKUP_SERVICE_HOST}\r\n\r\n".encode("ascii"))
+    await writer.drain()
+    status_line = await reader.readline()
+    content_length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            content_length = int(value)
+    body = await reader.readexactly(content_length)
+    return int(status_line.split()[1]), body
+
+
+async def run_client(port, paths, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(LOOKUP_SERVICE_HOST, port)
+    try:
+        while time.perf_counter() < deadline:
+            path = random.choice(paths)
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, path)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(path)
+    finally:
+        writer.close()
+
+
+async def run_load_test(clients=16, seconds=10, port=LOOKUP_SERVICE_PORT):
+    reader, writer = await asyncio.open_connection(LOOKUP_SERVICE_HOST, port)
+    _, body = await request(reader, writer, "/roots")
+    writer.close()
+    roots = json.loads(body)
+    paths = ["/roots"]
+    for root in roots:
+        paths.append(f"/root/{quote(root['root'])}")
+        paths.extend(f"/page/{page}" for page in root["pages"])
+    paths.extend(f"/aya/{sura}/{aya}" for sura, aya in [(random.randint(1, 114), 1) for _ in range(200)])
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*[run_client(port, paths, deadline, latencies, errors) for _ in range(clients)])
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    percentiles = statistics.quantiles(latencies_ms, n=100)
+    print(f"{len(latencies)} requests in {seconds}s with {clients} clients: {len(latencies) / seconds:.0f} requests/sec, "
+          f"{len(errors)} errors")
+    print(f"latency ms: p50 {percentiles[49]:.2f}, p90 {percentiles[89]:.2f}, p99 {percentiles[98]:.2f}, max {latencies_ms[-1]:.2f}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    asyncio.run(run_load_test(*args))
@@ -0,0 +1,176 @@
+# lookup_service.py
+"""
+Local HTTP lookup service over the corpus, the canonicalized entries and the layout of a previous build.
+
+Everything is loaded and indexed once, then answered from memory as JSON (asyncio, HTTP/1.1 keep-alive):
+
+    GET /roots                          every root with its number of entries and pages
+    GET /root/<root>                    entries of a root (token, glyph, translations) and the pages it is laid out on
+    GET /aya/<sura>/<aya>               tokens, glyphs, translations and roots of an aya (1-based numbers)
+    GET /glyph/<font_id>/<symbol>       tokens rendered by a glyph of a page font
+    GET /page/<page>                    roots laid out on a page of the book
+
+    python lookup_service.py [output/..._layout.json] [port]
+
+The layout file is saved next to each output PDF, pages are left empty when it is not given.
+"""
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import defaultdict
+from functools import lru_cache
+from urllib.parse import unquote
+
+from config import INPUT_DATA, LOOKUP_SERVICE_HOST, LOOKUP_SERVICE_PORT, RENDERED_TRANSLATIONS
+
+STATUS_LINES = {200: "200 OK", 400: "400 Bad Request", 404: "404 Not Found", 405: "405 Method Not Allowed"}
+
+
+class LookupIndex:
+    """Indexes of the loaded data, keyed the way the routes query them."""
+
+    def __init__(self, source_data, q_mapper, trans_lookup, layout=None):
+        layout = layout or {}
+        pages_per_root = layout.get("pages_per_root", {})
+        self.roots = {}
+        self.ayas = {}
+        self.glyphs = defaultdict(list)
+        self.pages = defaultdict(list)
+        aya_roots = defaultdict(list)
+
+        for root, entries in source_data:
+            root_entries = []
+            for entry in entries:
+                if entry["sura_no"] is None:  # padding of the double column layout
+                    continue
+                sura, aya = entry["sura_no"], entry["aya_no"]
+                root_entries.append({"sura": sura + 1, "aya": aya + 1, "word": entry["word"], "word_en": entry["word_en"],
+                                     "token_idx": entry["ar_word_id"], "font_id": entry["word_font_id"],
+                                     "glyph": entry["word_font_symbol"], "uthmani": entry["uthmani_equivalent"],
+                                     "simple": entry["simple_equivalent"],
+                                     "translations": self.get_translations(trans_lookup, sura, aya)})
+                if root not in aya_roots[sura, aya]:
+                    aya_roots[sura, aya].append(root)
+            self.roots[root] = {"root": root, "entries": root_entries, "pages": pages_per_root.get(root, [])}
+            for page in pages_per_root.get(root, []):
+                self.pages[page].append(root)
+
+        for (sura, aya), meta_data in list(q_mapper.items()):
+            if "uthmani" not in meta_data:  # missing keys looked up in the defaultdict
+                continue
+            self.ayas[sura, aya] = {"sura": sura + 1, "aya": aya + 1, "font_id": meta_data["font_id"],
+                                    "tokens": [{"uthmani": uthmani, "simple": simple, "glyph": symbol}
+                                               for uthmani, simple, symbol in zip(meta_data["uthmani"], meta_data["simple"], meta_data["symbols"])],
+                                    "translations": self.get_translations(trans_lookup, sura, aya),
+                                    "roots": aya_roots.get((sura, aya), [])}
+            for token_idx, (symbol, uthmani) in enumerate(zip(meta_data["symbols"], meta_data["uthmani"])):
+                self.glyphs[meta_data["font_id"], symbol].append({"sura": sura + 1, "aya": aya + 1,
+                                                                  "token_idx": token_idx, "uthmani": uthmani})
+
+        self.roots_summary = [{"root": root, "entries": len(data["entries"]), "pages": data["pages"]}
+                              for root, data in self.roots.items()]
+
+    @staticmethod
+    def get_translations(trans_lookup, sura, aya):
+        return dict(zip(RENDERED_TRANSLATIONS, trans_lookup.get_texts(sura, aya)))
+
+    def lookup(self, parts):
+        """Returns (status, payload) of the route given as path parts."""
+        match parts:
+            case ["roots"]:
+                return 200, self.roots_summary
+            case ["root", root] if root in self.roots:
+                return 200, self.roots[root]
+            case ["aya", sura, aya] if sura.isdigit() and aya.isdigit() and (int(sura) - 1, int(aya) - 1) in self.ayas:
+                return 200, self.ayas[int(sura) - 1, int(aya) - 1]
+            case ["glyph", font_id, symbol] if (font_id, symbol) in self.glyphs:
+                return 200, self.glyphs[font_id, symbol]
+            case ["page", page] if page.isdigit():
+                return 200, {"page": int(page), "roots": self.pages.get(int(page), [])}
+            case ["roots" | "root" | "aya" | "glyph" | "page", *_]:
+                return 404, {"error": "not found"}
+        return 400, {"error": "unknown route"}
+
+
+def load_lookup_index(layout_path=None, source_path=INPUT_DATA):
+    """Loads the data without registering fonts or exporting the extended spreadsheet, and indexes it."""
+    from resources_loader import preload_resources
+    from utils import canonicalize_entered_words
+
+    start = time.time()
+    source_data, q_mapper, trans_lookup = preload_resources(source_path, with_fonts=False)
+    source_data = canonicalize_entered_words(source_data, q_mapper, export=False)
+    layout = None
+    if layout_path:
+        with open(layout_path, encoding="utf-8") as f:
+            layout = json.load(f)
+    index = LookupIndex(source_data, q_mapper, trans_lookup, layout)
+    logging.info(f"Lookup index of {len(index.roots)} roots and {len(index.ayas)} ayas built in {time.time() - start:.2f}s")
+    return index
+
+
+def get_empty_response(status):
+    return f"HTTP/1.1 {STATUS_LINES[status]}\r\nContent-Length: 0\r\n".encode("ascii")
+
+
+class LookupServer:
+    def __init__(self, index):
+        self.index = index
+
+    @lru_cache(maxsize=4096)
+    def get_response(self, path):
+        """Encoded HTTP response of a path, the data doesn't change while the service runs so it is cached."""
+        parts = [unquote(part) for part in path.split("?")[0].strip("/").split("/")]
+        status, payload = self.index.lookup(parts)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        return (f"HTTP/1.1 {STATUS_LINES[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n").encode("ascii"), body
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while request_line := await reader.readline():
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                    content_length = int(headers.get("content-length", 0))
+                    if content_length < 0:
+                        raise ValueError(content_length)
+                except ValueError:
+                    writer.write(get_empty_response(400) + b"Connection: close\r\n\r\n")
+                    await writer.drain()
+                    break
+                # a chunked body can't be skipped without parsing it, the connection is closed after the reply
+                keep_alive = (headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                              and "transfer-encoding" not in headers)
+                # the body is not used, it is read so the next request line is found on a keep-alive connection
+                await reader.readexactly(content_length)
+
+                if method == "GET":
+                    head, body = self.get_response(path)
+                else:
+                    head, body = get_empty_response(405), b""
+                writer.write(head + (b"Connection: keep-alive\r\n\r\n" if keep_alive else b"Connection: close\r\n\r\n") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=LOOKUP_SERVICE_HOST, port=LOOKUP_SERVICE_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logging.info(f"Lookup service listening on http://{host}:{port}/")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    lookup_index = load_lookup_index(sys.argv[1] if len(sys.argv) > 1 else None)
+    asyncio.run(LookupServer(lookup_index).serve(port=int(sys.argv[2]) if len(sys.argv) > 2 else LOOKUP_SERVICE_PORT))
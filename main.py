@@ -1,7 +1,8 @@
 import logging
 
-from config import INPUT_DATA, OUTPUT_PDF
-from pdf_generation import generate_pdf
+from build_manifest import get_build_manifest
+from config import INPUT_DATA, get_output_pdf
+from preview_helper import get_preview_filter
 
 if __name__ == "__main__":
     # Set up basic logging configuration
@@ -11,5 +12,13 @@ if __name__ == "__main__":
         datefmt='%Y-%m-%d %H:%M:%S',
     )
 
-    generate_pdf(source_path=INPUT_DATA,
-                 output_path=OUTPUT_PDF)
+    output_path, preview = get_output_pdf(), get_preview_filter()
+    manifest = get_build_manifest(output_path, INPUT_DATA, preview)
+    if manifest is None or not manifest.reuse_previous_build():
+        # ReportLab and the rendering stages are imported only when the book is rendered
+        from pdf_generation import generate_pdf
+
+        generate_pdf(source_path=INPUT_DATA,
+                     output_path=output_path,
+                     preview=preview,
+                     manifest=manifest)
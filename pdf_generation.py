@@ -1,36 +1,42 @@
 # pdf_generation.py
+import io
+import json
 import logging
 import os
 from collections import defaultdict
 from copy import deepcopy
 from functools import partial
 
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, Spacer
+from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, SimpleDocTemplate, Paragraph, Table, Spacer
 from reportlab.platypus.doctemplate import _doNothing
 from tqdm import tqdm
 
 from bookmarks_helper import extract_root_tables_from_super_table, add_page_bookmarks
-from config import GENERAL_ARABIC_FONT, GENERAL_TABLE_RATIOS_SINGLE, GENERAL_TABLE_RATIOS_DOUBLE, PDF_TITLE, PDF_AUTHOR, PDF_SUBJECT, PDF_KEYWORDS, PDF_CREATOR, SINGLE_COLUMN
-from config import IS_ARABIC
-from headers_helpers import generate_columns_header, generate_root_header
-from quran_data import load_translation, create_font_text_mapping
+from build_manifest import get_build_manifest
+from compression_canvas import ParallelCompressionCanvas
+from config import GENERAL_ARABIC_FONT, GENERAL_TABLE_RATIOS_SINGLE, GENERAL_TABLE_RATIOS_DOUBLE, PDF_TITLE, PDF_AUTHOR, PDF_SUBJECT, PDF_KEYWORDS, PDF_CREATOR, STATS_APPENDIX, STREAMING_OUTPUT, LINEARIZE_OUTPUT, SPLIT_VOLUMES
+from config import BuildOptions
+from flowables_helper import AppendixTable, ArParagraph, AyaParagraph, CachedParagraph, ParagraphLayoutCache, get_sura_name_cells
+from headers_helpers import generate_columns_header_row, generate_root_header
+from layout_profiler import LayoutProfiler
+from pdf_postprocess import linearize_and_validate, add_volumes_outline
+from quran_data import TranslationRegistry
+from resources_loader import preload_resources
+from streaming_canvas import StreamingCanvas
 from styles_helpers import generate_quranic_paragraph_styles, generate_styles, generate_style_per_entry, get_root_subtable_style
-from utils import ArParagraph, get_numerals, load_source_data, is_non_decreasing, canonicalize_entered_words, register_fonts, get_sura_name_cells, get_cols_from_ratios
+from utils import get_numerals, is_non_decreasing, canonicalize_entered_words, get_cols_from_ratios, fit_entries_to_rows
+from xobjects_helper import log_form_savings
 
 
-def highlight_quran(meta_data, found_idx, highlight_color="red"):
+def get_aya_paragraph(meta_data, found_idx, aya_style, layout_cache):
+    """The aya symbols with the found one highlighted, empty when the word was not found."""
     if found_idx is None:
-        return ""
-    symbol_sequence = "".join(meta_data["symbols"][:-1])
-    highlighted_text = (
-            symbol_sequence[:found_idx] +
-            f'<font color="{highlight_color}">{symbol_sequence[found_idx]}</font>' +
-            symbol_sequence[found_idx + 1:]
-    )
-    return highlighted_text
+        return AyaParagraph("", aya_style, layout_cache)
+    return AyaParagraph("".join(meta_data["symbols"][:-1]), aya_style, layout_cache, highlight_idx=found_idx)
 
 
 def get_root_representation(meta_data, found_idx, entry):
@@ -46,11 +52,11 @@ def process_current_root(last_root, current_root, root_text):
         return root_text, ""
 
 
-def get_root_subtable(root_text, root_style, eng_word_style):
+def get_root_subtable(root_text, root_style, eng_word_style, is_arabic):
     if any(root_text):
         ara_text, eng_text = root_text
 
-        if IS_ARABIC:
+        if is_arabic:
             table = Table([
                 [ArParagraph(ara_text, root_style)]
             ])
@@ -67,79 +73,107 @@ def get_root_subtable(root_text, root_style, eng_word_style):
         return ""
 
 
-def generate_content_tables(source_data, page_width, q_mapper):
+def generate_content_tables(source_data, page_width, q_mapper, trans_lookup=None, export=True, layout_cache=None,
+                            options=None):
+    if options is None:
+        options = BuildOptions()
     quranic_styles = generate_quranic_paragraph_styles()
-    source_data = canonicalize_entered_words(source_data, q_mapper)
-    trans_lookup = load_translation()
+    source_data = canonicalize_entered_words(source_data, q_mapper, export)
+    if trans_lookup is None:
+        trans_lookup = TranslationRegistry()
+    if layout_cache is None:
+        layout_cache = ParagraphLayoutCache()
 
-    styles = generate_styles()
+    styles = generate_styles(options)
     styles["quranic_styles"] = quranic_styles
     tables = []
     last_root = None
+    if options.single_column:
+        table_width, table_ratios = page_width * .9, GENERAL_TABLE_RATIOS_SINGLE
+    elif options.column_flow:
+        table_width, table_ratios = get_column_table_width(page_width), GENERAL_TABLE_RATIOS_DOUBLE[:5]
+    else:
+        table_width, table_ratios = page_width * .9, GENERAL_TABLE_RATIOS_DOUBLE
     for root, entries in source_data:
-        root_header = generate_root_header(root, GENERAL_ARABIC_FONT, page_width)
-        fill_data = [[root_header]] + [generate_columns_header()]
+        main_table_cols = get_cols_from_ratios(table_ratios, table_width)
+        root_header = generate_root_header(root, GENERAL_ARABIC_FONT, table_width, options)
+        fill_data = [[root_header]] + [generate_columns_header_row(main_table_cols, options)]
 
-        if SINGLE_COLUMN:
+        if options.single_column:
             added_rows, last_root = single_column_layout_generator(entries, last_root,
                                                                    styles,
-                                                                   q_mapper, trans_lookup, )
+                                                                   q_mapper, trans_lookup, layout_cache, options)
+        elif options.column_flow:
+            added_rows, last_root = column_flow_layout_generator(entries, last_root, styles,
+                                                                 q_mapper, trans_lookup, layout_cache, options)
         else:
             added_rows, last_root = two_column_layout_generator(entries, last_root,
                                                                 styles,
-                                                                q_mapper, trans_lookup, )
+                                                                q_mapper, trans_lookup, layout_cache, options)
 
         fill_data.extend(added_rows)
 
-        main_table_cols = get_cols_from_ratios(
-            GENERAL_TABLE_RATIOS_SINGLE if SINGLE_COLUMN else GENERAL_TABLE_RATIOS_DOUBLE,
-            page_width * .9)
         table = Table(fill_data, colWidths=main_table_cols, repeatRows=2, )
 
-        table_style = generate_style_per_entry(fill_data)
+        table_style = generate_style_per_entry(fill_data, options)
 
         table.setStyle(table_style)
         tables.append(table)
+    if STATS_APPENDIX:
+        from appendix_helper import generate_appendix
+
+        tables.extend(generate_appendix(source_data, q_mapper, table_width, options, export))
     return tables
 
 
 def two_column_layout_generator(entries, last_root, styles,
-                                q_mapper, trans_lookup, ):
+                                q_mapper, trans_lookup, layout_cache, options):
     content_rows = []
     for idx in range(0, len(entries), 2):
         entry_right, entry_left = entries[idx], entries[idx + 1]
 
-        right_col_content, last_root = generate_entry_cells(entry_right, last_root, styles, q_mapper, trans_lookup)
-        left_col_content, last_root = generate_entry_cells(entry_left, last_root, styles, q_mapper, trans_lookup)
-        right_root_table = right_col_content[-1]
-        left_root_table = left_col_content[-1]
-        right_col_content[-1] = left_col_content[-1] = ""
-        if right_root_table:
-            right_root_table._argW = [0.75 * inch]
-            right_col_content[3] = [right_root_table] + [Spacer(1, 6)] + right_col_content[3]
-            for shift_cell in range(3):
-                right_col_content[shift_cell] = [Spacer(1, 22)] + [right_col_content[shift_cell]]
-        if left_root_table:
-            left_root_table._argW = [0.75 * inch]
-            left_col_content[3] = [left_root_table] + [Spacer(1, 12)] + left_col_content[3]
-            for shift_cell in range(3):
-                left_col_content[shift_cell] = [Spacer(1, 22)] + [left_col_content[shift_cell]]
+        right_col_content, last_root = generate_entry_cells(entry_right, last_root, styles, q_mapper, trans_lookup, layout_cache, options)
+        left_col_content, last_root = generate_entry_cells(entry_left, last_root, styles, q_mapper, trans_lookup, layout_cache, options)
+        move_root_table_above_aya(right_col_content, 6)
+        move_root_table_above_aya(left_col_content, 12)
 
         content_rows.append(left_col_content + ["", "", ] + right_col_content)
     return content_rows, last_root
 
 
+def column_flow_layout_generator(entries, last_root, styles,
+                                 q_mapper, trans_lookup, layout_cache, options):
+    """One entry per row laid out like a half row of the double column table, the frames make the two columns."""
+    content_rows = []
+    for entry in entries:
+        col_content, last_root = generate_entry_cells(entry, last_root, styles, q_mapper, trans_lookup, layout_cache, options)
+        move_root_table_above_aya(col_content, 6)
+        content_rows.append(col_content)
+    return content_rows, last_root
+
+
+def move_root_table_above_aya(col_content, spacing):
+    """Stacks the root subtable of a double column entry above its aya, the aya then spans the root column."""
+    root_table = col_content[-1]
+    col_content[-1] = ""
+    if root_table:
+        root_table._argW = [0.75 * inch]
+        col_content[3] = [root_table] + [Spacer(1, spacing)] + col_content[3]
+        for shift_cell in range(3):
+            col_content[shift_cell] = [Spacer(1, 22)] + [col_content[shift_cell]]
+
+
 def single_column_layout_generator(entries, last_root, styles,
-                                   q_mapper, trans_lookup, ):
+                                   q_mapper, trans_lookup, layout_cache, options):
     content_rows = []
     for entry_right in entries:
-        row_content, last_root = generate_entry_cells(entry_right, last_root, styles, q_mapper, trans_lookup)
+        row_content, last_root = generate_entry_cells(entry_right, last_root, styles, q_mapper, trans_lookup, layout_cache, options)
         content_rows.append(row_content)
 
     return content_rows, last_root
 
 
-def generate_entry_cells(entry, last_root, styles, q_mapper, trans_lookup):
+def generate_entry_cells(entry, last_root, styles, q_mapper, trans_lookup, layout_cache, options):
     centered_numeral_style = styles["centered_numeral_style"]
     centered_text_eng_style = styles["centered_text_eng_style"]
     english_root_style = styles["english_root_style"]
@@ -154,20 +188,20 @@ def generate_entry_cells(entry, last_root, styles, q_mapper, trans_lookup):
     root = get_root_representation(entry_meta, idx, entry)
     last_root, root = process_current_root(last_root, root, (entry["word"], entry["word_en"]))
 
-    root_table = get_root_subtable(root, quranic_style, english_root_style)
+    root_table = get_root_subtable(root, quranic_style, english_root_style, options.is_arabic)
 
-    quranic_text = [ArParagraph(highlight_quran(entry_meta, idx), aya_style)]
+    quranic_text = [get_aya_paragraph(entry_meta, idx, aya_style, layout_cache)]
 
-    if not IS_ARABIC:
-        quranic_text = quranic_text + [Paragraph(trans_lookup[sura, aya], translation_style)]
+    if not options.is_arabic:
+        quranic_text = quranic_text + [CachedParagraph(text, translation_style, layout_cache) for text in trans_lookup.get_texts(sura, aya)]
 
     added_cols = [
         # sura num
-        Paragraph(get_numerals(sura), centered_numeral_style),
+        Paragraph(get_numerals(sura, options.is_arabic), centered_numeral_style),
         # sura name
-        get_sura_name_cells(entry, centered_text_eng_style, centered_text_ar_style),
+        get_sura_name_cells(entry, centered_text_eng_style, centered_text_ar_style, options.is_arabic),
         # aya num
-        Paragraph(get_numerals(aya), centered_numeral_style),
+        Paragraph(get_numerals(aya, options.is_arabic), centered_numeral_style),
         # quranic text
         quranic_text,
         # root word
@@ -178,8 +212,9 @@ def generate_entry_cells(entry, last_root, styles, q_mapper, trans_lookup):
 
 
 class QuranDocument(SimpleDocTemplate):
-    def __init__(self, filename, **kw):
+    def __init__(self, filename, options=None, **kw):
         super().__init__(filename, **kw)
+        self.options = BuildOptions() if options is None else options
         # bookmark tracking
         self.entries_per_table = None
         self.page_id = 1
@@ -195,6 +230,9 @@ class QuranDocument(SimpleDocTemplate):
         # rendered rows tracking
         self.rendered_counts = []
         self.roots_per_page = defaultdict(list)
+        self.pages_per_root = defaultdict(list)
+        # form xobject reuse tracking, form name -> [stream size, uses]
+        self.form_stats = defaultdict(lambda: [0, 0])
 
     def afterPage(self):
         if self.is_last and self.bookmarks[-1][0] == self.page_id:
@@ -206,11 +244,13 @@ class QuranDocument(SimpleDocTemplate):
         self.is_last = False
         self.processed_flowables += 1
 
-        if self.entries_per_table and isinstance(flowable, Table):
+        if self.entries_per_table and isinstance(flowable, Table) and not isinstance(flowable, AppendixTable):
             self.roots_per_page[self.page_id].extend(extract_root_tables_from_super_table(flowable))
             last_rendered = len(flowable._cellvalues) - 2
             current_root = self.entries_per_table[self.current_root_idx]
             current_root[1] -= last_rendered
+            if last_rendered and self.page_id not in self.pages_per_root[current_root[0]]:
+                self.pages_per_root[current_root[0]].append(self.page_id)
 
             assert current_root[1] >= 0, current_root
             if current_root[1] == 0 and self.current_root_idx < len(self.entries_per_table) - 1:
@@ -220,6 +260,12 @@ class QuranDocument(SimpleDocTemplate):
             self.rendered_counts.append(last_rendered)
             self.pbar.update(last_rendered)
 
+    @property
+    def current_root(self):
+        if self.entries_per_table and 0 <= self.current_root_idx < len(self.entries_per_table):
+            return self.entries_per_table[self.current_root_idx][0]
+        return None
+
     def push_bookmark(self):
         if self.entries_per_table:
             self.current_root_idx += 1
@@ -227,18 +273,37 @@ class QuranDocument(SimpleDocTemplate):
                 root = self.entries_per_table[self.current_root_idx][0]
                 self.bookmarks.append([self.page_id, root])
 
-    def build(self, flowables, onFirstPage=_doNothing, onLaterPages=_doNothing, canvasmaker=canvas.Canvas, entries_per_table=None):
+    def build(self, flowables, onFirstPage=_doNothing, onLaterPages=_doNothing, canvasmaker=canvas.Canvas, entries_per_table=None,
+              profiler=None):
         self.entries_per_table = deepcopy(entries_per_table)
         self.total_entries = sum([e for _, e in self.entries_per_table])
         self.push_bookmark()
         self.pbar = tqdm(total=self.total_entries, desc="Building PDF", unit="Entries")
 
         self.total_flowables = len(flowables)
-        super().build(deepcopy(flowables), onFirstPage, onLaterPages, canvasmaker)
+        flowables = deepcopy(flowables)
+        if profiler is not None:
+            # only the flowables of this story copy are profiled, concurrent builds are left alone
+            profiler.document = self
+            profiler.instrument(flowables)
+        self.build_story(flowables, onFirstPage, onLaterPages, canvasmaker)
+
+    def build_story(self, flowables, onFirstPage, onLaterPages, canvasmaker):
+        if self.options.single_column or not self.options.column_flow:
+            return super().build(flowables, onFirstPage, onLaterPages, canvasmaker)
+        # SimpleDocTemplate.build with the two frames of the column flow
+        self._calc()
+        frames = get_column_frames(self.pagesize[0], self.bottomMargin, self.height)
+        on_page_end = partial(draw_column_separator, right_frame=frames[0])
+        self.addPageTemplates([PageTemplate(id="First", frames=frames, onPage=onFirstPage, onPageEnd=on_page_end,
+                                            pagesize=self.pagesize),
+                               PageTemplate(id="Later", frames=frames, onPage=onLaterPages, onPageEnd=on_page_end,
+                                            pagesize=self.pagesize)])
+        BaseDocTemplate.build(self, flowables, canvasmaker=canvasmaker)
 
     def get_bookmarks_lookup(self, source_data):
         """Creates a comprehensive mapping of Quranic text to font symbols and returns a lookup dictionary."""
-        if IS_ARABIC:
+        if self.options.is_arabic:
             bookmarks = self.get_extended_arabic_nested_bookmarks(source_data)
         else:
             bookmarks = defaultdict(list)
@@ -284,7 +349,7 @@ class QuranDocument(SimpleDocTemplate):
     def distribute_entries(self, source_data):
         assert sum(self.rendered_counts) == self.total_entries
         current = 0
-        entries_per_row = (1 if SINGLE_COLUMN else 2)
+        entries_per_row = (1 if self.options.one_entry_per_row else 2)
         distributed_data = []
         for count in self.rendered_counts:
             current_root, current_entries = source_data[current]
@@ -294,36 +359,200 @@ class QuranDocument(SimpleDocTemplate):
                 current += 1
         return distributed_data
 
-
-def generate_pdf(source_path, output_path):
-    source_data = load_source_data(source_path)
-    entries_per_row = (1 if SINGLE_COLUMN else 2)
-    entries_per_table = [[root, len(entries) // entries_per_row] for root, entries in source_data]
-    register_fonts()
+    def get_layout_record(self):
+        """Where every root was laid out, for the lookup service (lookup_service.py) and the page previews."""
+        return {"pages": self.page_id - 1,
+                "bookmarks": self.bookmarks,
+                "pages_per_root": dict(self.pages_per_root),
+                "roots_per_page": dict(self.roots_per_page)}
+
+    def save_layout_record(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.get_layout_record(), f, ensure_ascii=False)
+
+
+def render_document(content_tables, source_data, entries_per_table, output, canvas_maker, metadata=None, options=None):
+    """
+    Lays out the content tables in a first pass to locate the bookmarks, then renders them into output, a path or a
+    file-like object. The first pass is written to the null device, so concurrent builds don't share any file.
+    The options (BuildOptions, the config.py ones by default) must be those the content tables were generated with.
+    """
+    if options is None:
+        options = BuildOptions()
     p_width, p_height = A4
-    pdf = QuranDocument("tmp.pdf", pagesize=(p_width, p_height), bottomMargin=.05 * p_height, topMargin=.05 * p_height)
-
-    q_mapper = create_font_text_mapping()
-    content_tables = generate_content_tables(source_data, p_width, q_mapper)
-    logging.info("Performing layout calculations")
-    pdf.build(content_tables, entries_per_table=entries_per_table, )
+    profiler = LayoutProfiler() if options.profile_layout else None
+    # the first pass output is thrown away, its streams are not compressed
+    with open(os.devnull, "wb") as discard:
+        pdf = QuranDocument(discard, options, pagesize=(p_width, p_height), bottomMargin=.05 * p_height,
+                            topMargin=.05 * p_height, pageCompression=0)
+        logging.info("Performing layout calculations")
+        pdf.build(content_tables, entries_per_table=entries_per_table, canvasmaker=canvas_maker, profiler=profiler)
     bookmarks_lookup = pdf.get_bookmarks_lookup(source_data)
     # distributed_data = pdf.distribute_entries(source_data)
     # generate_content_tables(distributed_data, p_width,)
-    pdf = QuranDocument(output_path, pagesize=(p_width, p_height), bottomMargin=.05 * p_height, topMargin=.05 * p_height)
-    os.remove("tmp.pdf")
+    pdf = QuranDocument(output, options, pagesize=(p_width, p_height), bottomMargin=.05 * p_height, topMargin=.05 * p_height)
 
     logging.info("Rendering layout..")
 
     # Set the document metadata
-    pdf.title = PDF_TITLE
-    pdf.author = PDF_AUTHOR
-    pdf.subject = PDF_SUBJECT
-    pdf.keywords = PDF_KEYWORDS
-    pdf.creator = PDF_CREATOR
+    metadata = {**get_default_metadata(), **(metadata or {})}
+    pdf.title = metadata["title"]
+    pdf.author = metadata["author"]
+    pdf.subject = metadata["subject"]
+    pdf.keywords = metadata["keywords"]
+    pdf.creator = metadata["creator"]
 
     pdf.build(
         content_tables, entries_per_table=entries_per_table,
-        onFirstPage=partial(add_page_bookmarks, bookmarks_lookup=bookmarks_lookup, ),
-        onLaterPages=partial(add_page_bookmarks, bookmarks_lookup=bookmarks_lookup),
+        onFirstPage=partial(add_page_bookmarks, bookmarks_lookup=bookmarks_lookup, is_arabic=options.is_arabic),
+        onLaterPages=partial(add_page_bookmarks, bookmarks_lookup=bookmarks_lookup, is_arabic=options.is_arabic),
+        canvasmaker=canvas_maker,
+        profiler=profiler,
     )
+    log_form_savings(pdf.form_stats)
+    if profiler:
+        profiler.log_summary()
+    return pdf
+
+
+def get_column_table_width(page_width):
+    """Width of the tables of the column flow, a column of the double column table without the separator."""
+    return page_width * .9 * sum(GENERAL_TABLE_RATIOS_DOUBLE[:5]) / sum(GENERAL_TABLE_RATIOS_DOUBLE)
+
+
+def get_column_frames(page_width, bottom_margin, height):
+    """Right then left frame of the column flow, the separator space of the double column table is kept between them."""
+    frame_width = page_width * .9 / 2
+    separator = frame_width - get_column_table_width(page_width)
+    return [Frame(page_width / 2, bottom_margin, frame_width, height, id="right",
+                  leftPadding=separator, rightPadding=0, topPadding=0, bottomPadding=0),
+            Frame(page_width / 2 - frame_width, bottom_margin, frame_width, height, id="left",
+                  leftPadding=0, rightPadding=separator, topPadding=0, bottomPadding=0)]
+
+
+def draw_column_separator(canvas, doc, right_frame):
+    """Dark red line of the double column table between the columns of the flow, down to the end of the right column."""
+    canvas.saveState()
+    canvas.setStrokeColor(colors.darkred)
+    canvas.setLineWidth(1)
+    canvas.line(right_frame._x1, right_frame._y2, right_frame._x1, right_frame._y)
+    canvas.restoreState()
+
+
+def get_default_metadata():
+    return {"title": PDF_TITLE, "author": PDF_AUTHOR, "subject": PDF_SUBJECT, "keywords": PDF_KEYWORDS, "creator": PDF_CREATOR}
+
+
+def group_roots_by_first_letter(source_data):
+    """Groups the indices of the sorted roots by their first letter, the first level of the bookmarks tree."""
+    letter_groups = defaultdict(list)
+    for root_idx, (root, _) in enumerate(source_data):
+        letter_groups[root.split()[0]].append(root_idx)
+    return sorted(letter_groups.items())
+
+
+def render_volumes(content_tables, source_data, entries_per_table, output_path, canvas_maker, options):
+    """
+    Renders one volume per first root letter and a JSON index mapping every root to its volume and page, returns the
+    paths of the written files.
+    """
+    volumes = []
+    roots_index = {}
+    for volume_idx, (letter, root_indices) in enumerate(group_roots_by_first_letter(source_data), start=1):
+        volume_path = output_path.replace(".pdf", f"_vol{volume_idx:02d}.pdf")
+        logging.info(f"Rendering volume {volume_idx} ({letter}) with {len(root_indices)} roots")
+        pdf = render_document([content_tables[idx] for idx in root_indices],
+                              [source_data[idx] for idx in root_indices],
+                              [entries_per_table[idx] for idx in root_indices],
+                              volume_path, canvas_maker, options=options)
+        pdf.save_layout_record(volume_path.replace(".pdf", "_layout.json"))
+        volume_name = os.path.basename(volume_path)
+        volumes.append({"file": volume_name, "letter": letter, "roots": len(root_indices), "pages": pdf.page_id - 1})
+        for page, root in pdf.bookmarks:
+            roots_index[root] = {"volume": volume_name, "page": page}
+
+    volume_paths = [output_path.replace(".pdf", f"_vol{idx:02d}.pdf") for idx in range(1, len(volumes) + 1)]
+    add_volumes_outline(volume_paths, [volume["letter"] for volume in volumes])
+    if LINEARIZE_OUTPUT:
+        for volume_path in volume_paths:
+            linearize_and_validate(volume_path)
+    index_path = output_path.replace(".pdf", "_index.json")
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({"volumes": volumes, "roots": roots_index}, f, ensure_ascii=False, indent=1)
+    logging.info(f"{index_path} has been saved..")
+    layout_paths = [volume_path.replace(".pdf", "_layout.json") for volume_path in volume_paths]
+    return volume_paths + layout_paths + [index_path]
+
+
+def get_canvas_maker(canvas_cls, options):
+    return partial(canvas_cls, compression_level=options.compression_level, compression_workers=options.compression_workers)
+
+
+def get_entries_per_table(source_data, options):
+    """[root, table rows] of every root of the source data, fitted to the rows of the layout (fit_entries_to_rows)."""
+    entries_per_row = (1 if options.one_entry_per_row else 2)
+    return [[root, len(entries) // entries_per_row] for root, entries in source_data]
+
+
+def render_pdf(source_data, q_mapper, trans_lookup, output_path, export=True, options=None):
+    """
+    Renders the loaded resources (with the fonts registered) into output_path, or its volumes, export saves the extended
+    spreadsheet. Returns the paths of the written PDF and side files.
+    """
+    if options is None:
+        options = BuildOptions()
+    source_data = fit_entries_to_rows(source_data, options.one_entry_per_row)
+    entries_per_table = get_entries_per_table(source_data, options)
+    canvas_maker = get_canvas_maker(StreamingCanvas if STREAMING_OUTPUT else ParallelCompressionCanvas, options)
+    p_width, p_height = A4
+
+    layout_cache = ParagraphLayoutCache()
+    content_tables = generate_content_tables(source_data, p_width, q_mapper, trans_lookup, export, layout_cache, options)
+    if SPLIT_VOLUMES:
+        output_paths = render_volumes(content_tables, source_data, entries_per_table, output_path, canvas_maker, options)
+    else:
+        pdf = render_document(content_tables, source_data, entries_per_table, output_path, canvas_maker, options=options)
+        pdf.save_layout_record(output_path.replace(".pdf", "_layout.json"))
+        if LINEARIZE_OUTPUT:
+            linearize_and_validate(output_path)
+        output_paths = [output_path, output_path.replace(".pdf", "_layout.json")]
+    layout_cache.log_stats()
+    return output_paths
+
+
+def generate_pdf(source_path, output_path, preview=None, manifest=None):
+    """
+    Builds the book, or with a PreviewFilter only the selected roots, without exporting the extended spreadsheet.
+    With BUILD_MANIFEST, the book of the last build is reused when none of its inputs changed. A manifest the caller
+    already compared (main.py does, before importing this module) is passed as manifest and only saved.
+    """
+    if manifest is None:
+        manifest = get_build_manifest(output_path, source_path, preview)
+        if manifest and manifest.reuse_previous_build():
+            return
+    source_data, q_mapper, trans_lookup = preload_resources(source_path, preview=preview)
+    output_paths = render_pdf(source_data, q_mapper, trans_lookup, output_path, export=preview is None)
+    if manifest:
+        manifest.save(output_paths)
+
+
+def build_pdf_bytes(source_data, q_mapper, trans_lookup, metadata=None, options=None):
+    """
+    Library entry point: builds the book of the given data in memory and returns (PDF bytes, layout record), the
+    layout record holding the bookmarks and the pages of every root. Nothing is written to disk apart from the
+    canonicalization cache, so several builds can run concurrently in one process (fonts registered beforehand,
+    e.g. by preload_resources). The metadata dict overrides the PDF_* options (title, author, subject..), the
+    options (BuildOptions) the layout, profiling and compression options of config.py for this build only.
+    """
+    if options is None:
+        options = BuildOptions()
+    source_data = fit_entries_to_rows(source_data, options.one_entry_per_row)
+    entries_per_table = get_entries_per_table(source_data, options)
+    layout_cache = ParagraphLayoutCache()
+    content_tables = generate_content_tables(source_data, A4[0], q_mapper, trans_lookup, export=False,
+                                             layout_cache=layout_cache, options=options)
+    output = io.BytesIO()
+    pdf = render_document(content_tables, source_data, entries_per_table, output,
+                          get_canvas_maker(ParallelCompressionCanvas, options), metadata, options)
+    layout_cache.log_stats()
+    return output.getvalue(), pdf.get_layout_record()
@@ -0,0 +1,98 @@
+# pdf_postprocess.py
+import io
+import logging
+import os
+import re
+import sys
+
+LINEARIZATION_DICT_PATTERN = re.compile(rb"<<\s*/Linearized\s.*?>>", re.S)
+
+
+def linearize_pdf(path):
+    """Rewrites the PDF at path as a linearized ("fast web view") file, first page objects and hint tables up front."""
+    import pikepdf
+
+    linearized_path = path + ".linearized"
+    with pikepdf.open(path) as pdf:
+        pdf.save(linearized_path, linearize=True)
+    os.replace(linearized_path, path)
+
+
+def parse_linearization_dict(head):
+    """Extracts the integer (and hint array) entries of the linearization dictionary found at the start of the file."""
+    match = LINEARIZATION_DICT_PATTERN.search(head)
+    if match is None:
+        return None
+    params = {}
+    for key, value in re.findall(rb"/(\w+)\s*(\[[^\]]*\]|\d+)", match.group(0)):
+        if value.startswith(b"["):
+            params[key.decode()] = [int(v) for v in value[1:-1].split()]
+        else:
+            params[key.decode()] = int(value)
+    return params
+
+
+def validate_linearization(path):
+    """Checks the linearization structure and byte ranges of a PDF, returns a list of problems (empty when valid)."""
+    import pikepdf
+
+    problems = []
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(1024)  # the linearization dictionary must be within the first 1024 bytes
+    params = parse_linearization_dict(head)
+    if params is None:
+        return ["no linearization dictionary in the first 1024 bytes"]
+
+    if params.get("L") != file_size:
+        problems.append(f"/L is {params.get('L')} but the file has {file_size} bytes")
+    hint_offset, hint_length = (params.get("H") or [0, 0])[:2]
+    if not 0 < hint_offset < hint_offset + hint_length <= file_size:
+        problems.append(f"hint stream range {hint_offset}+{hint_length} is outside the file")
+    if not 0 < params.get("E", 0) <= file_size:
+        problems.append(f"end of first page /E={params.get('E')} is outside the file")
+    if not 0 < params.get("T", 0) < file_size:
+        problems.append(f"main xref offset /T={params.get('T')} is outside the file")
+
+    with pikepdf.open(path) as pdf:
+        if params.get("N") != len(pdf.pages):
+            problems.append(f"/N is {params.get('N')} but the document has {len(pdf.pages)} pages")
+        if params.get("O") != pdf.pages[0].objgen[0]:
+            problems.append(f"/O is {params.get('O')} but the first page is object {pdf.pages[0].objgen[0]}")
+        qpdf_report = io.StringIO()
+        if not pdf.check_linearization(qpdf_report):
+            problems.append(f"qpdf linearization check failed: {qpdf_report.getvalue().strip()}")
+    return problems
+
+
+def linearize_and_validate(path):
+    linearize_pdf(path)
+    problems = validate_linearization(path)
+    for problem in problems:
+        logging.error(f"Linearization problem in {path}: {problem}")
+    if not problems:
+        logging.info(f"{path} has been linearized ({os.path.getsize(path)} bytes)")
+    return problems
+
+
+def add_volumes_outline(volume_paths, volume_titles):
+    """Adds a "Volumes" outline entry to every volume, linking to the first page of each volume file."""
+    import pikepdf
+
+    volume_names = [os.path.basename(volume_path) for volume_path in volume_paths]
+    for volume_path in volume_paths:
+        with pikepdf.open(volume_path, allow_overwriting_input=True) as pdf:
+            with pdf.open_outline() as outline:
+                volumes_item = pikepdf.OutlineItem("Volumes")
+                for volume_name, volume_title in zip(volume_names, volume_titles):
+                    go_to_volume = pikepdf.Dictionary(S=pikepdf.Name.GoToR, F=volume_name,
+                                                      D=pikepdf.Array([0, pikepdf.Name.Fit]))
+                    volumes_item.children.append(pikepdf.OutlineItem(volume_title, action=go_to_volume))
+                outline.root.insert(0, volumes_item)
+            pdf.save(volume_path)
+
+
+if __name__ == "__main__":
+    for pdf_path in sys.argv[1:]:
+        found_problems = validate_linearization(pdf_path)
+        print(pdf_path, "OK" if not found_problems else found_problems)
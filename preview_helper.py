@@ -0,0 +1,67 @@
+# preview_helper.py
+import glob
+import json
+import logging
+import os
+
+from config import PREVIEW_LETTERS, PREVIEW_PAGES, PREVIEW_ROOTS, get_output_pdf
+
+# the hamza forms sort below the bare alif (U+0623 < U+0627), they are compared as alif as in dictionaries
+ALIF_FORMS = str.maketrans("ءأإآٱ", "ااااا")
+
+
+def normalize_letter(letter):
+    return letter.translate(ALIF_FORMS)
+
+
+def find_previous_layout():
+    """Layout record of the last full build with the current layout options (*_layout.json saved next to the PDF)."""
+    flags = os.path.basename(get_output_pdf(preview=False)).split("_", 1)[1].replace(".pdf", "_layout.json")
+    layouts = glob.glob(os.path.join(os.path.dirname(get_output_pdf(preview=False)), f"*_{flags}"))
+    if not layouts:
+        raise FileNotFoundError(f"no previous *_{flags} to select the preview pages from, build the whole book first")
+    return max(layouts, key=os.path.getmtime)
+
+
+class PreviewFilter:
+    """Selects the roots of a quick preview: exact roots, first letter ranges, or the pages of a previous build."""
+
+    def __init__(self, roots=None, letters=None, pages=None, layout_path=None):
+        self.roots = set(roots or [])
+        self.letters = letters or []  # [(first letter, last letter)], inclusive, hamza forms compared as alif
+        self.pages = pages  # (first page, last page) of the previous build
+        self.layout_path = layout_path
+
+    def get_pages_roots(self):
+        layout_path = self.layout_path or find_previous_layout()
+        with open(layout_path, encoding="utf-8") as f:
+            pages_per_root = json.load(f)["pages_per_root"]
+        first_page, last_page = self.pages
+        logging.info(f"Preview of the pages {first_page}-{last_page} of {layout_path}")
+        return {root for root, pages in pages_per_root.items() if any(first_page <= page <= last_page for page in pages)}
+
+    def is_selected(self, root, pages_roots):
+        first_letter = normalize_letter(root.split()[0])
+        return (root in self.roots
+                or any(normalize_letter(first) <= first_letter <= normalize_letter(last) for first, last in self.letters)
+                or root in pages_roots)
+
+    def select(self, source_data):
+        pages_roots = self.get_pages_roots() if self.pages else set()
+        selected = [(root, entries) for root, entries in source_data if self.is_selected(root, pages_roots)]
+        if not selected:
+            raise ValueError("No root matches the preview options")
+        logging.info(f"Preview of {len(selected)}/{len(source_data)} roots")
+        return selected
+
+
+def get_preview_filter():
+    """The PreviewFilter of the PREVIEW_* options, None when the whole book is built."""
+    if not (PREVIEW_ROOTS or PREVIEW_LETTERS or PREVIEW_PAGES):
+        return None
+    return PreviewFilter(PREVIEW_ROOTS, PREVIEW_LETTERS, PREVIEW_PAGES)
+
+
+def get_page_font_ids(source_data, q_mapper):
+    """QPC page fonts used by the entries (and the default one of the padding entries), the only ones a preview registers."""
+    return {q_mapper[entry["sura_no"], entry["aya_no"]]["font_id"] for _, entries in source_data for entry in entries}
@@ -4,7 +4,7 @@ from collections import defaultdict
 
 import xmltodict
 
-from config import MUSHAF_RES, MUSHAF_META, QURAN_TEXT, TRANSLATION_XML, UTH_TO_SIMPLE
+from config import MUSHAF_RES, MUSHAF_META, QURAN_TEXT, RENDERED_TRANSLATIONS, TRANSLATION_FILES, TRANSLATION_XML, UTH_TO_SIMPLE
 
 
 def load_ayas_fonts_per_page():
@@ -37,10 +37,10 @@ def load_quran_text():
     return quran_text
 
 
-def generate_aligned_pairs():
+def generate_aligned_pairs(meta_quran=None):
     """Aligns Quranic text with font symbols, ensuring proper mapping for each aya."""
     ayas_font = load_ayas_fonts_per_page()
-    suras_meta = load_quran_meta()["quran"]["suras"]["sura"]
+    suras_meta = (meta_quran or load_quran_meta())["quran"]["suras"]["sura"]
     quran_sura_text = load_quran_text()["quran"]["sura"]
 
     quran_text_to_font_pairs = []
@@ -82,16 +82,18 @@ def generate_aligned_pairs():
     return quran_text_to_font_pairs
 
 
-def create_font_text_mapping():
+def create_font_text_mapping(aligned_pairs=None, uth_to_simple_pairs=None):
     """Creates a comprehensive mapping of Quranic text to font symbols and returns a lookup dictionary."""
 
-    # Align text and font data for all suras and ayas
-    aligned_pairs = generate_aligned_pairs()
-    uth_to_simple = dict(load_uthmani_to_simple_pairs())
+    # Align text and font data for all suras and ayas, unless already loaded
+    if aligned_pairs is None:
+        aligned_pairs = generate_aligned_pairs()
+    if uth_to_simple_pairs is None:
+        uth_to_simple_pairs = load_uthmani_to_simple_pairs()
+    uth_to_simple = dict(uth_to_simple_pairs)
 
     # Create a lookup dictionary from the generated pairs
     lookup = defaultdict(lambda: {"symbols": "", "font_id": "p1"})
-    uthm_token_lookup = {}
     for entry in aligned_pairs:
         key = (entry["sura_no"] - 1, entry["aya_no"] - 1)
         lookup[key] = {"symbols": entry["font_symbols"],
@@ -99,28 +101,76 @@ def create_font_text_mapping():
                        "font_id": entry["font_id"],
                        "simple": [uth_to_simple[w] for w in entry["uthmani_tokens"]]
                        }
-        for symbol, uthmani_token in zip(entry["font_symbols"], lookup[key]["uthmani"]):
-            uthm_token_lookup[entry["font_id"], symbol] = uthmani_token
     return lookup
 
 
+def create_glyph_text_lookup(q_mapper):
+    """Maps each font symbol to the Uthmani token it renders, grouped by font id: {font_id: {symbol: token}}."""
+    glyph_text_lookup = defaultdict(dict)
+    for meta_data in q_mapper.values():
+        # the aya end symbol has no token, zip stops before it
+        for symbol, uthmani_token in zip(meta_data["symbols"], meta_data.get("uthmani", [])):
+            glyph_text_lookup[meta_data["font_id"]][symbol] = uthmani_token
+    return glyph_text_lookup
+
+
 def replace_repeated_hyphens(text):
     """Removes sequences of hyphens longer than 10 from the text."""
     pattern = r'-{11,}'  # Matches sequences of 11 or more hyphens
     return re.sub(pattern, "", text)
 
 
-def load_translation():
-    """Reads a Quran translation file and removes repeated hyphens from the text."""
-    lookup = defaultdict(lambda: "")  # Default to empty string if not found
-    with open(TRANSLATION_XML, 'r') as f:
+def parse_translation(path=TRANSLATION_XML):
+    """Reads a Quran translation file into a plain {(sura, aya): text} dict, removing repeated hyphens from the text."""
+    translations = {}
+    with open(path, 'r') as f:
         quran_trans = xmltodict.parse(replace_repeated_hyphens(f.read()))
         for sura in quran_trans["quran"]["sura"]:
             sura_id = int(sura["@index"]) - 1
             for aya in sura["aya"]:
                 aya_index = int(aya["@index"]) - 1
-                lookup[sura_id, aya_index] = aya["@text"]
-    return lookup
+                translations[sura_id, aya_index] = aya["@text"]
+    return translations
+
+
+class TranslationLookup:
+    """Compact {(sura, aya): text} lookup of a single translation, a list of aya texts per sura, "" when not found."""
+
+    def __init__(self, sura_texts):
+        self.sura_texts = sura_texts
+
+    @classmethod
+    def from_dict(cls, translations):
+        sura_texts = []
+        for (sura, aya), text in translations.items():
+            sura_texts.extend([] for _ in range(sura + 1 - len(sura_texts)))
+            sura_texts[sura].extend("" for _ in range(aya + 1 - len(sura_texts[sura])))
+            sura_texts[sura][aya] = text
+        return cls(sura_texts)
+
+    def __getitem__(self, key):
+        sura, aya = key
+        try:
+            return self.sura_texts[sura][aya]
+        except (IndexError, TypeError):  # padding entries of the double column layout have no sura
+            return ""
+
+
+class TranslationRegistry:
+    """The translations of every configured language, each file is parsed the first time its language is requested."""
+
+    def __init__(self, files=None, lookups=None):
+        self.files = TRANSLATION_FILES if files is None else files
+        self.lookups = dict(lookups or {})
+
+    def __getitem__(self, language):
+        if language not in self.lookups:
+            self.lookups[language] = TranslationLookup.from_dict(parse_translation(self.files[language]))
+        return self.lookups[language]
+
+    def get_texts(self, sura, aya, languages=RENDERED_TRANSLATIONS):
+        """Translations of the aya in the given languages, in order."""
+        return [self[language][sura, aya] for language in languages]
 
 
 def load_uthmani_to_simple_pairs():
@@ -0,0 +1,75 @@
+# resources_loader.py
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import CHECK_GLYPH_COVERAGE, IS_ARABIC, QURAN_TEXT_LAYER, RENDERED_TRANSLATIONS, SOURCE_ROOTS, SOURCE_SURAS, TRANSLATION_FILES
+from corpus_db import is_corpus_db, load_source_records_from_db, load_quran_meta_from_db, load_font_text_mapping_from_db, load_translations_from_db
+from fonts_helper import load_fonts, register_fonts
+from glyph_coverage import verify_glyph_coverage
+from preview_helper import get_page_font_ids
+from quran_data import load_quran_meta, generate_aligned_pairs, load_uthmani_to_simple_pairs, parse_translation, create_font_text_mapping, create_glyph_text_lookup, TranslationLookup, TranslationRegistry
+from utils import read_source_records, load_source_data, filter_source_records
+
+
+def get_preloaded_translations():
+    """Languages parsed with the other resources: the rendered ones, none for the Arabic layout which renders none."""
+    return [] if IS_ARABIC else RENDERED_TRANSLATIONS
+
+
+def load_resources_from_db(db_path, roots=None, suras=None):
+    """Reads the entries of the selected roots/suras, then only the ayas and translations they need, with indexed queries."""
+    records = load_source_records_from_db(db_path, roots, suras)
+    source_data = load_source_data(db_path, records=records, meta=load_quran_meta_from_db(db_path))
+    needed_ayas = {(entry["sura_no"], entry["aya_no"]) for _, entries in source_data for entry in entries if entry["sura_no"] is not None}
+    q_mapper = load_font_text_mapping_from_db(db_path, needed_ayas)
+    trans_lookup = TranslationRegistry(lookups={
+        language: TranslationLookup.from_dict(load_translations_from_db(db_path, language, needed_ayas))
+        for language in get_preloaded_translations()
+    })
+    return source_data, q_mapper, trans_lookup
+
+
+def preload_resources(source_path, roots=SOURCE_ROOTS, suras=SOURCE_SURAS, with_fonts=True, preview=None):
+    """
+    Loads the spreadsheet, the Quran text/font alignment, the rendered translations and the fonts concurrently.
+
+    Each resource is parsed exactly once: the Quran metadata is shared by the spreadsheet loader and the alignment.
+    The parsing runs in worker processes (it is pure python, threads would serialize on the GIL) and only returns
+    plain picklable data, the fonts are parsed meanwhile in this process since TTFont objects can't be pickled.
+    A database built by corpus_db.py is read directly instead, for the selected roots/suras only.
+    With a PreviewFilter, only the previewed roots are kept and only their QPC page fonts are parsed, once known.
+    Returns (source_data, q_mapper, trans_lookup), with the fonts registered unless with_fonts is False.
+    With CHECK_GLYPH_COVERAGE, the page fonts are checked first and a missing glyph stops the build (ValueError).
+    """
+    start = time.time()
+    if with_fonts and CHECK_GLYPH_COVERAGE:
+        verify_glyph_coverage()
+    if is_corpus_db(source_path):
+        source_data, q_mapper, trans_lookup = load_resources_from_db(source_path, roots, suras)
+        fonts = load_fonts() if with_fonts and preview is None else None
+    else:
+        meta = load_quran_meta()
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            records_future = executor.submit(read_source_records, source_path)
+            pairs_future = executor.submit(generate_aligned_pairs, meta)
+            uth_to_simple_future = executor.submit(load_uthmani_to_simple_pairs)
+            # only the rendered translations are parsed, the registry parses other languages on demand
+            translation_futures = {language: executor.submit(parse_translation, TRANSLATION_FILES[language])
+                                   for language in get_preloaded_translations()}
+
+            fonts = load_fonts() if with_fonts and preview is None else None
+
+            records = filter_source_records(records_future.result(), roots, suras)
+            source_data = load_source_data(source_path, records=records, meta=meta)
+            q_mapper = create_font_text_mapping(pairs_future.result(), uth_to_simple_future.result())
+            trans_lookup = TranslationRegistry(lookups={language: TranslationLookup.from_dict(future.result())
+                                                        for language, future in translation_futures.items()})
+
+    if preview is not None:
+        source_data = preview.select(source_data)
+        fonts = load_fonts(get_page_font_ids(source_data, q_mapper)) if with_fonts else None
+    if with_fonts:
+        register_fonts(create_glyph_text_lookup(q_mapper) if QURAN_TEXT_LAYER else None, fonts)
+    logging.info(f"Resources preloaded in {time.time() - start:.2f}s")
+    return source_data, q_mapper, trans_lookup
@@ -0,0 +1,125 @@
+# streaming_canvas.py
+import tempfile
+import zlib
+
+from reportlab import rl_config
+from reportlab.pdfbase.pdfdoc import (PDFStream, PDFArray, PDFName, PDFFile, PDFIndirectObject, PDFCrossReferenceTable,
+                                      PDFTrailer)
+
+from compression_canvas import ParallelCompressionCanvas
+
+
+class SpilledStream(PDFStream):
+    """A page content stream kept on disk until the document is saved."""
+
+    def __init__(self, spill_file, offset, length, compressed):
+        super().__init__()
+        self.spill_file = spill_file
+        self.offset = offset
+        self.length = length
+        if compressed:
+            # the content is already deflated, so PDFStream must not apply the filters again
+            self.dictionary["Filter"] = PDFArray([PDFName("FlateDecode")])
+        self.__Comment__ = "page stream"
+
+    def format(self, document):
+        self.spill_file.seek(self.offset)
+        self.content = self.spill_file.read(self.length)
+        try:
+            return super().format(document)
+        finally:
+            self.content = None
+
+
+class OutputFile(PDFFile):
+    """PDFFile writing the formatted objects to the output file as they come, instead of collecting them in memory."""
+
+    def __init__(self, f, pdf_version):
+        self.write = f.write
+        self.offset = 0
+        # the header of ReportLab
+        self.add(PDFFile(pdf_version).format(None))
+
+    def format(self, document):
+        return b""
+
+
+def write_document(doc, canvas, f):
+    """
+    PDFDocument.GetPDFData and format writing every indirect object to f as soon as it is formatted, its offset is
+    recorded for the cross-reference table. Only one object (a page stream read back from the spill file) is held in
+    memory at a time, instead of the whole file.
+    """
+    for font in doc.delayedFonts:
+        font.addObjects(doc)
+    doc.delayedFonts = []
+    doc.info.invariant = doc.invariant
+    doc.info.digest(doc.signature)
+    doc.Reference(doc.Catalog)
+    doc.Reference(doc.info)
+    doc.Outlines.prepare(doc, canvas)
+    if doc.Outlines.ready < 0:
+        doc.Catalog.Outlines = None
+    doc.encrypt.prepare(doc)
+    encrypt_info = doc.encrypt.info()
+    encrypt_ref = doc.Reference(encrypt_info) if encrypt_info else None
+
+    output = OutputFile(f, doc._pdfVersion)
+    ids = []
+    # objects may be registered while the previous ones are formatted
+    while len(ids) + 1 in doc.numberToId:
+        oid = doc.numberToId[len(ids) + 1]
+        obj = doc.idToObject[oid]
+        formatted = PDFIndirectObject(oid, obj).format(doc)
+        if not rl_config.invariant and rl_config.pdfComments:
+            output.add(f"% {ascii(oid)}: class {obj.__class__.__name__[:50]} \n")
+        doc.idToOffset[oid] = output.add(formatted)
+        ids.append(oid)
+    xref = PDFCrossReferenceTable()
+    xref.addsection(0, ids)
+    xref_offset = output.add(xref.format(doc))
+    trailer = PDFTrailer(startxref=xref_offset, Size=len(ids) + 1, Root=doc.Reference(doc.Catalog),
+                         Info=doc.Reference(doc.info), Encrypt=encrypt_ref, ID=doc.ID())
+    output.add(trailer.format(doc))
+
+
+class StreamingCanvas(ParallelCompressionCanvas):
+    """
+    Canvas that flushes each finished page stream to a temporary spill file, and writes the PDF object by object.
+
+    ReportLab keeps every page stream in memory until save(), then joins the whole file in memory before writing it,
+    only the (offset, length) of each page is kept here and the objects are written to the output one at a time.
+    The pages are deflated as they are flushed, only the font subsets are left to the worker pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._spill_file = tempfile.TemporaryFile(prefix="quran_pages_")
+
+    def showPage(self):
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        content = page.stream
+        if not content:
+            return
+        if isinstance(content, str):
+            content = content.encode("utf8")
+        if page.compression:
+            content = zlib.compress(content, self.compression_level)
+
+        self._spill_file.seek(0, 2)
+        offset = self._spill_file.tell()
+        self._spill_file.write(content)
+        page.Contents = SpilledStream(self._spill_file, offset, len(content), page.compression)
+        page.stream = None
+
+    def save(self):
+        try:
+            self.compress_pending_streams()
+            if hasattr(self._filename, "write"):
+                write_document(self._doc, self, self._filename)
+            else:
+                with open(self._filename, "wb") as f:
+                    write_document(self._doc, self, f)
+        finally:
+            self._spill_file.close()
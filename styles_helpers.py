@@ -7,8 +7,14 @@ from reportlab.lib.enums import TA_RIGHT, TA_CENTER, TA_LEFT
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.platypus import TableStyle
 
-from config import GENERAL_ARABIC_FONT, QURAN_FONT_SIZE, QURAN_LINE_SPACING, GENERAL_ENGLISH_FONT, GENERAL_FONT_SIZE, TRANSLATION_LINE_SPACING, HEADER_PADDING, TABLE_PADDING, TABLE_BK_COLOR, QURAN_ROW_SEPARATOR, ROOT_HEADER_BK_COLOR, ROOT_BG_COLOR, ROOT_BORDER_COLOR, SINGLE_COLUMN, FONT_ROOT
-from config import IS_ARABIC
+from config import GENERAL_ARABIC_FONT, QURAN_FONT_SIZE, QURAN_LINE_SPACING, GENERAL_ENGLISH_FONT, TRANSLATION_LINE_SPACING, TABLE_PADDING, QURAN_ROW_SEPARATOR, FONT_ROOT, REUSE_FORM_XOBJECTS
+
+###################################
+# color options (kept out of config.py, which doesn't import ReportLab)
+ROOT_HEADER_BK_COLOR = colors.beige
+TABLE_BK_COLOR = colors.white
+ROOT_BORDER_COLOR = colors.Color(red=0, green=0, blue=0)
+ROOT_BG_COLOR = colors.Color(red=0.8, green=0.2, blue=0.0, alpha=0.1)
 
 
 def get_root_subtable_style():
@@ -27,11 +33,11 @@ def get_root_subtable_style():
     ]
 
 
-def generate_root_table_style(font):
+def generate_root_table_style(font, options):
     return TableStyle([
         ('BACKGROUND', (0, 0), (-1, -1), ROOT_HEADER_BK_COLOR),
         ('FONTNAME', (0, 0), (-1, -1), font),
-        ('FONTSIZE', (0, 0), (-1, -1), GENERAL_FONT_SIZE * 1.2),
+        ('FONTSIZE', (0, 0), (-1, -1), options.general_font_size * 1.2),
         ('ALIGN', (0, 0), (0, -1), "LEFT"),
         ('ALIGN', (1, 0), (1, -1), "CENTER"),
         ('ALIGN', (2, 0), (2, -1), "RIGHT"),
@@ -44,20 +50,25 @@ def generate_root_table_style(font):
     ])
 
 
-def generate_style_per_entry(fill_data, ):
-    general_font = GENERAL_ARABIC_FONT if IS_ARABIC else GENERAL_ENGLISH_FONT
-    tbl_style = get_generic_table_style()
+def generate_style_per_entry(fill_data, options):
+    general_font = options.general_font
+    tbl_style = get_generic_table_style(options)
     table_style = TableStyle(tbl_style)
     for font_row_idx, row in enumerate(fill_data):
         if font_row_idx < 2:
             table_style.add('BACKGROUND', (0, font_row_idx), (-1, font_row_idx), TABLE_BK_COLOR)
             table_style.add('FONTNAME', (0, font_row_idx), (-1, font_row_idx), general_font)
-            table_style.add('FONTSIZE', (0, font_row_idx), (-1, font_row_idx), GENERAL_FONT_SIZE)
+            table_style.add('FONTSIZE', (0, font_row_idx), (-1, font_row_idx), options.general_font_size)
             table_style.add('LINEBELOW', (0, font_row_idx), (-1, font_row_idx), 0.5, colors.black)
+            if font_row_idx == 1 and REUSE_FORM_XOBJECTS:
+                # the columns header is a single form flowable spanning the whole row
+                table_style.add('SPAN', (0, 1), (-1, 1))
+                for padding in ['LEFTPADDING', 'RIGHTPADDING', 'TOPPADDING', 'BOTTOMPADDING']:
+                    table_style.add(padding, (0, 1), (-1, 1), 0)
         else:
             merge_padding = row[4] == ""
             table_style.add('SPAN', (3, font_row_idx), (4 if merge_padding else 3, font_row_idx))
-            if not SINGLE_COLUMN:
+            if not options.one_entry_per_row:
                 merge_padding = row[11] == ""
                 table_style.add('SPAN', (10, font_row_idx), (11 if merge_padding else 10, font_row_idx))
 
@@ -67,12 +78,41 @@ def generate_style_per_entry(fill_data, ):
 
             if len(row[3]) > 1:
                 table_style.add('LINEABOVE', (0, font_row_idx), (5, font_row_idx), 0.05, colors.black if QURAN_ROW_SEPARATOR else colors.transparent)
-            if not SINGLE_COLUMN and len(row[10]) > 1:
+            if not options.one_entry_per_row and len(row[10]) > 1:
                 table_style.add('LINEABOVE', (6, font_row_idx), (-1, font_row_idx), 0.05, colors.black if QURAN_ROW_SEPARATOR else colors.transparent)
 
     return table_style
 
 
+def generate_columns_header_style(options):
+    """Same look as the columns header row of the generic table style, for a standalone header table."""
+    general_font = options.general_font
+    single_column = [
+        ('FONTNAME', (0, 0), (-1, -1), general_font),
+        ('FONTSIZE', (0, 0), (-1, -1), options.general_font_size),
+        ('ALIGN', (0, 0), (-1, -1), "CENTER"),
+        ('ALIGN', (3, 0), (4, 0), "RIGHT"),
+        ('RIGHTPADDING', (4, 0), (4, -1), 1),
+        ('LEFTPADDING', (0, 0), (0, -1), 1),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), TABLE_PADDING),
+        ('TOPPADDING', (0, 0), (-1, -1), TABLE_PADDING),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+    ]
+
+    double_columns = [
+        ('ALIGN', (10, 0), (11, 0), "RIGHT"),
+        ('LINEAFTER', (5, 0), (5, -1), 1, colors.darkred),
+        ('LINEBEFORE', (6, 0), (6, -1), 1, colors.darkred),
+        ('LEFTPADDING', (7, 0), (7, -1), 1),
+        ('RIGHTPADDING', (5, 0), (5, -1), 0),
+        ('LEFTPADDING', (5, 0), (5, -1), 0),
+        ('RIGHTPADDING', (6, 0), (6, -1), 0),
+        ('LEFTPADDING', (6, 0), (6, -1), 0),
+        ('RIGHTPADDING', (11, 0), (12, -1), 1),
+    ]
+    return TableStyle(single_column + ([] if options.one_entry_per_row else double_columns))
+
+
 def generate_quranic_paragraph_styles():
     quran_style = {}
     for ttf_file in glob.glob(os.path.join(FONT_ROOT , "p[0-9]*.ttf")):
@@ -92,14 +132,40 @@ def generate_quranic_paragraph_styles():
     return quran_style
 
 
-def generate_styles():
-    font_name = GENERAL_ARABIC_FONT if IS_ARABIC else GENERAL_ENGLISH_FONT
+def generate_appendix_styles(options):
+    """Title and table style of the statistics appendix (STATS_APPENDIX)."""
+    title_style = ParagraphStyle(
+        'appendix_title',
+        fontName=options.general_font,
+        fontSize=options.general_font_size * 1.6,
+        leading=options.general_font_size * 2.4,
+        alignment=TA_CENTER,
+        spaceBefore=TABLE_PADDING * 4,
+        spaceAfter=TABLE_PADDING * 2,
+    )
+    table_style = TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), options.general_font),
+        ('FONTSIZE', (0, 0), (-1, -1), options.general_font_size),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('BACKGROUND', (0, 0), (-1, 0), ROOT_HEADER_BK_COLOR),
+        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+        ('LINEBELOW', (0, 1), (-1, -1), 0.05, colors.lightgrey),
+        ('BOX', (0, 0), (-1, -1), 0.5, colors.black),
+        ('TOPPADDING', (0, 0), (-1, -1), TABLE_PADDING / 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), TABLE_PADDING / 2),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+    return title_style, table_style
+
+
+def generate_styles(options):
+    font_name = options.general_font
 
     # Define the shared styles for numerals and sura names
     centered_numeral_style = ParagraphStyle(
         'numeral',
         fontName=font_name,
-        fontSize=GENERAL_FONT_SIZE,
+        fontSize=options.general_font_size,
         alignment=TA_CENTER,
         splitLongWords=False,
     )
@@ -107,7 +173,7 @@ def generate_styles():
     centered_text_eng_style = ParagraphStyle(
         'centered_style_eng',
         fontName=GENERAL_ENGLISH_FONT,
-        fontSize=GENERAL_FONT_SIZE,
+        fontSize=options.general_font_size,
         alignment=TA_CENTER,
         splitLongWords=False,
     )
@@ -115,7 +181,7 @@ def generate_styles():
     english_root_style = ParagraphStyle(
         'root_centered_style_eng',
         fontName=GENERAL_ENGLISH_FONT,
-        fontSize=GENERAL_FONT_SIZE * 1.2,
+        fontSize=options.general_font_size * 1.2,
         textColor=colors.darkblue,  # Set the text color to dark blue
         alignment=TA_CENTER,
         splitLongWords=False,
@@ -124,7 +190,7 @@ def generate_styles():
     centered_text_ar_style = ParagraphStyle(
         'centered_style_ar',
         fontName=GENERAL_ARABIC_FONT,
-        fontSize=GENERAL_FONT_SIZE,
+        fontSize=options.general_font_size,
         alignment=TA_CENTER,
         splitLongWords=False,
     )
@@ -132,7 +198,7 @@ def generate_styles():
     translation_style = ParagraphStyle(
         'left_aligned_style',
         fontName=GENERAL_ENGLISH_FONT,
-        fontSize=GENERAL_FONT_SIZE,
+        fontSize=options.general_font_size,
         alignment=TA_LEFT,
         leading=TRANSLATION_LINE_SPACING,
         spaceBefore=TRANSLATION_LINE_SPACING,
@@ -148,7 +214,7 @@ def generate_styles():
     }
 
 
-def get_generic_table_style():
+def get_generic_table_style(options):
     single_column = [
         # row 0
         ('SPAN', (0, 0), (-1, 0)),
@@ -160,7 +226,7 @@ def get_generic_table_style():
         ('LINEBELOW', (0, 1), (4, 1), 0.5, colors.black),
         ('RIGHTPADDING', (4, 0), (4, -1), 1),
         ('LEFTPADDING', (0, 0), (0, -1), 1),
-        ('BOTTOMPADDING', (0, 0), (-1, 1), HEADER_PADDING),
+        ('BOTTOMPADDING', (0, 0), (-1, 1), options.header_padding),
         ('BOTTOMPADDING', (0, 1), (-1, -1), TABLE_PADDING),
         ('TOPPADDING', (0, 0), (-1, -1), TABLE_PADDING),
         ('INNERGRID', (0, 2), (-1, -2), 0.5, colors.transparent),
@@ -180,4 +246,4 @@ def get_generic_table_style():
         ('LEFTPADDING', (6, 0), (6, -1), 0),
         ('RIGHTPADDING', (11, 0), (12, -1), 1),
     ]
-    return single_column + ([] if SINGLE_COLUMN else double_columns)
+    return single_column + ([] if options.one_entry_per_row else double_columns)
@@ -1,45 +1,48 @@
 # utils.py
 
-import glob
 import logging
 import os
 from collections import defaultdict
+from functools import lru_cache
 
-import pandas as pd
-from arabic_reshaper import ArabicReshaper
-from bidi.algorithm import get_display
-from fuzzywuzzy import process
-from fuzzywuzzy.fuzz import partial_ratio
-from pyarabic.normalize import normalize_searchtext
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import Paragraph
-
-from config import DATA_REPEAT_MULTIPLIER, INPUT_DATA, SINGLE_COLUMN, FONT_ROOT
+from config import DATA_REPEAT_MULTIPLIER, INPUT_DATA, ONE_ENTRY_PER_ROW
 from config import IS_ARABIC
 from quran_data import load_quran_meta
 
-reshaper = ArabicReshaper(configuration={
-    'delete_harakat': True,
-    'shift_harakat_position': False,
-    'use_unshaped_instead_of_isolated': False,
-    "support_zwj": False
-})
+# fuzzy matching scores of the entered words: not found at or below the minimum, reported below the good score
+MIN_MATCH_SCORE = 70
+GOOD_MATCH_SCORE = 85
+
+
+# heavy dependencies (pandas, fuzzywuzzy, pyarabic, arabic_reshaper, python-bidi) are imported by the functions using them,
+# so importing this module stays cheap for the stages that don't need them (see import_benchmark.py)
+@lru_cache(maxsize=None)
+def get_reshaper():
+    from arabic_reshaper import ArabicReshaper
+    return ArabicReshaper(configuration={
+        'delete_harakat': True,
+        'shift_harakat_position': False,
+        'use_unshaped_instead_of_isolated': False,
+        "support_zwj": False
+    })
 
 
 def ar(text):
-    reshaped_text = reshaper.reshape(text)
+    from bidi.algorithm import get_display
+    reshaped_text = get_reshaper().reshape(text)
     return get_display(reshaped_text)
 
 
-def get_numerals(number_string):
+def get_numerals(number_string, is_arabic=IS_ARABIC):
     if number_string is not None:
         number_string += 1
     else:
         number_string = ""
-    number_string = str(number_string)
+    return localize_digits(str(number_string), is_arabic)
+
 
-    if IS_ARABIC:
+def localize_digits(number_string, is_arabic=IS_ARABIC):
+    if is_arabic:
         arabic_numerals = {
             '0': '٠', '1': '١', '2': '٢', '3': '٣', '4': '٤',
             '5': '٥', '6': '٦', '7': '٧', '8': '٨', '9': '٩'
@@ -49,10 +52,21 @@ def get_numerals(number_string):
     return number_string
 
 
-def load_source_data(path):
-    df = pd.read_excel(path)
-    records = df.to_dict(orient='records')
-    meta = load_quran_meta()
+def read_source_records(path):
+    import pandas as pd
+    return pd.read_excel(path).to_dict(orient='records')
+
+
+def filter_source_records(records, roots=None, suras=None):
+    return [record for record in records
+            if (not roots or record["root"] in roots) and (not suras or record["sura_no"] in suras)]
+
+
+def load_source_data(path, records=None, meta=None):
+    if records is None:
+        records = read_source_records(path)
+    if meta is None:
+        meta = load_quran_meta()
     sura_name_ar = {int(sura["@index"]) - 1: sura["@name"] for sura in meta["quran"]["suras"]["sura"]}
     sura_name_en = {int(sura["@index"]) - 1: sura["@ename"] for sura in meta["quran"]["suras"]["sura"]}
     for entry in records:
@@ -67,43 +81,86 @@ def load_source_data(path):
     for root_group in root_groups:
         root_groups[root_group].sort(key=lambda x: (x["sura_no"], x["aya_no"]))
         root_groups[root_group] *= DATA_REPEAT_MULTIPLIER
-        if not SINGLE_COLUMN and len(root_groups[root_group]) % 2 == 1:
+
+    return fit_entries_to_rows([(k, root_groups[k]) for k in sorted(root_groups)], ONE_ENTRY_PER_ROW)
+
+
+def fit_entries_to_rows(source_data, one_entry_per_row):
+    """
+    The entries of every root padded with an empty entry to an even count for the two entries rows of the double
+    column table, or without the padding entries for the one entry rows. The given lists are left as they are.
+    """
+    fitted_data = []
+    for root, entries in source_data:
+        if one_entry_per_row:
+            entries = [entry for entry in entries if entry["sura_no"] is not None]
+        elif len(entries) % 2 == 1:
             default_entry = defaultdict(lambda: None)
             default_entry["sura_name_ar"] = default_entry["sura_name_en"] = default_entry["word"] = default_entry["word_en"] = ""
-            root_groups[root_group].append(default_entry)
+            entries = entries + [default_entry]
+        fitted_data.append((root, entries))
+    return fitted_data
 
-    return [(k, root_groups[k]) for k in sorted(root_groups)]
 
-
-def find_token_index(meta_data, target_word):
-    if len(target_word) == 0:
-        return None
+def fuzzy_match_token(meta_data, target_word):
+    """Returns the index of the aya token closest to target_word and the fuzzy matching score, whatever the score."""
+    from fuzzywuzzy import process
+    from fuzzywuzzy.fuzz import partial_ratio
+    from pyarabic.normalize import normalize_searchtext
 
     # Perform fuzzy matching on the word list using the search key
     options = meta_data["simple"]
     word, score = process.extractOne(target_word, options, scorer=partial_ratio, processor=normalize_searchtext)
+    return options.index(word), score
+
 
-    found_idx = options.index(word)
-    assert score > 70
-    if score < 85:
-        print("Fuzzy matching warning:", word, target_word, score)
-    return found_idx
+def match_token(meta_data, target_word):
+    """Returns the index of the aya token closest to target_word and the fuzzy matching score."""
+    if len(target_word) == 0:
+        return None, None
+    found_idx, score = fuzzy_match_token(meta_data, target_word)
+    assert score > MIN_MATCH_SCORE
+    if score < GOOD_MATCH_SCORE:
+        print("Fuzzy matching warning:", meta_data["simple"][found_idx], target_word, score)
+    return found_idx, score
 
 
-def canonicalize_entered_words(source_data, q_mapper):
+def find_token_index(meta_data, target_word):
+    return match_token(meta_data, target_word)[0]
+
+
+def resolve_entered_word(quran_meta, word):
+    """Resolves the entered word to its token in the aya: index, font symbol, simple/Uthmani equivalents and score."""
+    idx, score = match_token(quran_meta, word)
+    return {"ar_word_id": idx,
+            "word_font_symbol": None if idx is None else quran_meta["symbols"][idx],
+            "simple_equivalent": None if idx is None else quran_meta["simple"][idx],
+            "uthmani_equivalent": None if idx is None else quran_meta["uthmani"][idx],
+            "match_score": score}
+
+
+def canonicalize_entered_words(source_data, q_mapper, export=True):
+    from canonicalization_cache import CanonicalizationCache
+
+    # rows already matched by a previous build with the same corpus are read from the cache
+    cache = CanonicalizationCache()
     for root, entries in source_data:
         for entry in entries:
-            sura, aya = entry["sura_no"], entry["aya_no"]
+            sura, aya, word = entry["sura_no"], entry["aya_no"], entry["word"]
             quran_meta = q_mapper[sura, aya]
-            idx = find_token_index(quran_meta, entry["word"])
+            resolution = cache.get(sura, aya, word)
+            if resolution is None:
+                resolution = resolve_entered_word(quran_meta, word)
+                cache.put(sura, aya, word, resolution)
             entry["word_font_id"] = quran_meta["font_id"]
-            entry["ar_word_id"] = idx
-            entry["word_font_symbol"] = None if idx is None else quran_meta["symbols"][idx]
-            entry["simple_equivalent"] = None if idx is None else quran_meta["simple"][idx]
-            entry["uthmani_equivalent"] = None if idx is None else quran_meta["uthmani"][idx]
-    extended_data_path = INPUT_DATA.replace(".xlsx", "-extended.xlsx")
-    pd.DataFrame(sum([a for _, a in source_data], []), ).to_excel(extended_data_path)
-    logging.info(f"{extended_data_path} has been saved..")
+            entry.update(resolution)
+    cache.save()
+    cache.log_stats()
+    if export:
+        import pandas as pd
+        extended_data_path = os.path.splitext(INPUT_DATA)[0] + "-extended.xlsx"
+        pd.DataFrame(sum([a for _, a in source_data], []), ).to_excel(extended_data_path)
+        logging.info(f"{extended_data_path} has been saved..")
     return source_data
 
 
@@ -114,58 +171,7 @@ def is_non_decreasing(lst):
     return True
 
 
-class ArParagraph(Paragraph):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-    def breakLines(self, width):
-        broken = super().breakLines(width)
-        ara_lines = []
-        for line_data in broken.lines:
-            if isinstance(line_data, tuple):
-                rem, lines = line_data
-                ara_lines.append((rem, [line[::-1] for line in lines]))
-            else:
-                for word in line_data.words:
-                    word.text = word.text[::-1]
-                line_data.words = line_data.words[::-1]
-                ara_lines.append(line_data)
-
-        broken.lines = ara_lines
-
-        return broken
-
-
-def register_fonts():
-    ttf_files = sorted(glob.glob(os.path.join(FONT_ROOT, "*.ttf")))
-    for ttf_file in ttf_files:
-        font_name = os.path.splitext(os.path.basename(ttf_file))[0]
-        pdfmetrics.registerFont(TTFont(font_name, ttf_file))
-
-    specific_fonts = [
-        ("Nabi", "Nabi Regular.ttf"),
-        ("me_quran", "me_quran Regular.ttf"),
-        ("Arial", "Arial-Unicode-Bold.ttf"),
-    ]
-    for font_name, font_file in specific_fonts:
-        pdfmetrics.registerFont(TTFont(font_name, os.path.join(FONT_ROOT, font_file)))
-
-    noto_fonts = ["Bold", "Medium", "Regular", "SemiBold", "VariableFont_wght"]
-    for noto_font in noto_fonts:
-        font_name = f"NotoNaskhArabic-{noto_font}"
-        pdfmetrics.registerFont(TTFont(font_name, os.path.join(FONT_ROOT, f"{font_name}.ttf")))
-
-
 def get_cols_from_ratios(ratios, page_width):
     total = sum(ratios)
     ratios = [ratio / total for ratio in ratios]
     return [page_width * ratio for ratio in ratios]
-
-
-def get_sura_name_cells(entry, eng_style, ar_style):
-    if IS_ARABIC:
-        return Paragraph(ar(entry["sura_name_ar"]), ar_style)
-    return [
-        Paragraph(ar(entry["sura_name_en"]), eng_style),
-        Paragraph(ar(entry["sura_name_ar"]), ar_style),
-    ]
@@ -0,0 +1,54 @@
+import hashlib
+import logging
+
+from reportlab.platypus import Flowable
+
+FORM_BBOX_MARGIN = 2  # room for border lines drawn on the flowable edges
+
+
+def get_form_name(prefix, key):
+    return f"{prefix}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+class FormFlowable(Flowable):
+    """
+    Draws the wrapped flowable once into a PDF Form XObject and references it on every later draw.
+
+    Used for elements repeated on many pages (column headers, root headers repeated by repeatRows),
+    so the page streams only carry a short "Do" operator instead of the full drawing operators.
+    """
+
+    def __init__(self, flowable, form_name):
+        super().__init__()
+        self.flowable = flowable
+        self.form_name = form_name
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = self.flowable.wrap(availWidth, availHeight)
+        return self.width, self.height
+
+    def draw(self):
+        canv = self.canv
+        form_stats = getattr(getattr(canv, "_doctemplate", None), "form_stats", None)
+        if not canv.hasForm(self.form_name):
+            canv.beginForm(self.form_name,
+                           -FORM_BBOX_MARGIN, -FORM_BBOX_MARGIN,
+                           self.width + FORM_BBOX_MARGIN, self.height + FORM_BBOX_MARGIN)
+            self.flowable.drawOn(canv, 0, 0)
+            if form_stats is not None:
+                form_stats[self.form_name][0] = len("\n".join(canv._code))
+            canv.endForm()
+        canv.doForm(self.form_name)
+        if form_stats is not None:
+            form_stats[self.form_name][1] += 1
+
+
+def log_form_savings(form_stats):
+    """Reports how many page stream bytes were replaced by Form XObject references."""
+    if not form_stats:
+        return
+    reference_size = len("/FormXob.xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx Do")
+    total_draws = sum(uses for _, uses in form_stats.values())
+    saved_bytes = sum(max(0, size - reference_size) * (uses - 1) for size, uses in form_stats.values())
+    logging.info(f"Form XObjects: {len(form_stats)} forms referenced {total_draws} times, "
+                 f"~{saved_bytes / 1024:.1f} KB of page operators saved (before compression)")